@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Generates synthetic Boa output of a given shape and (approximate) size.
+
+Usage:   python benchmarks/generate.py SHAPE SIZE [FILE]
+
+SHAPE is one of: flat, weighted, nested, grouped, multiline. SIZE is a
+number of bytes, optionally suffixed by K, M or G (e.g., 64M). The output
+is written to FILE, or to stdout.
+"""
+
+import itertools
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bop.sort import parse_size  # noqa
+
+__all__ = ['SHAPES', 'parse_size', 'write_output']
+
+
+def flat_lines():
+    # e.g., counts[] = 42
+    for i in itertools.count():
+        yield 'counts[] = %d\n' % (i * 7919 % 100000,)
+
+
+def weighted_lines():
+    # e.g., licenses[] = License 42, 7
+    for i in itertools.count():
+        yield 'licenses[] = License %d, %d\n' % (i % 5000, i % 97)
+
+
+def nested_lines():
+    # Like LINE_WITH_NESTED_VALUE in bop/test/parser_test.py.
+    for i in itertools.count():
+        yield ('Varargs[http://sourceforge.net/projects/p%d]'
+               '[/src/org/example/File%d.java][%d] = %d\n'
+               % (i // 1000, i // 2, i, i % 7))
+
+
+def grouped_lines(group_size=100, depth=4):
+    # Every group_size consecutive records share their first depth-1 keys,
+    # as Boa groups its output.
+    for i in itertools.count():
+        group = i // group_size
+        prefix = ''.join('[http://example.org/level%d/%d]' % (level, group)
+                         for level in range(depth - 1))
+        yield 'Varargs%s[%d] = %d\n' % (prefix, i, i % 7)
+
+
+def multiline_lines():
+    # Every value spans several lines, some of them blank.
+    for i in itertools.count():
+        yield ('comments[p%d][File%d.java] = /**\n'
+               ' * Frobnicates widget %d.\n'
+               '\n'
+               ' * @param widget the widget\n'
+               ' * @return whether it worked\n'
+               ' */\n' % (i // 100, i, i))
+
+
+SHAPES = {
+    'flat': flat_lines,
+    'weighted': weighted_lines,
+    'nested': nested_lines,
+    'grouped': grouped_lines,
+    'multiline': multiline_lines,
+}
+
+
+def write_output(f, shape, size):
+    """
+    Writes output of the given ``shape`` to the text file ``f`` until at
+    least ``size`` bytes have been written. Returns the number of lines
+    written.
+    """
+    written = lines = 0
+    for text in SHAPES[shape]():
+        if written >= size:
+            break
+        f.write(text)
+        # All generated text is ASCII.
+        written += len(text)
+        lines += text.count('\n')
+    return lines
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) not in (2, 3) or args[0] not in SHAPES:
+        sys.exit(__doc__.strip())
+    shape, size = args[0], parse_size(args[1])
+    if len(args) == 3:
+        with open(args[2], 'w') as f:
+            write_output(f, shape, size)
+    else:
+        write_output(sys.stdout, shape, size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Reports the peak resident set size of parsing a large, deeply nested
+synthetic output with bop.parse().
+
+Usage:   python benchmarks/memory.py [--compact] [number-of-lines]
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import bop  # noqa
+
+
+def write_nested_output(f, lines):
+    for i in range(lines):
+        f.write('Varargs[http://sourceforge.net/projects/p%d]'
+                '[/src/org/example/File%d.java][%d] = %d\n'
+                % (i // 1000, i // 2, i, i % 7))
+
+
+def peak_rss_mib():
+    # ru_maxrss is in KiB on Linux, and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak //= 1024
+    return peak / 1024.0
+
+
+def main():
+    args = sys.argv[1:]
+    compact = '--compact' in args
+    if compact:
+        args.remove('--compact')
+    lines = int(args[0]) if args else 1000000
+    fd, path = tempfile.mkstemp(suffix='.txt')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            write_nested_output(f, lines)
+        baseline = peak_rss_mib()
+
+        start = time.time()
+        with open(path) as f:
+            result = bop.parse(f, compact=compact)
+        elapsed = time.time() - start
+
+        sys.stdout.write('lines:        %d\n' % (lines,))
+        sys.stdout.write('time:         %.2f s\n' % (elapsed,))
+        sys.stdout.write('peak RSS:     %.1f MiB\n' % (peak_rss_mib(),))
+        sys.stdout.write('parse growth: %.1f MiB\n'
+                         % (peak_rss_mib() - baseline,))
+        del result
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Measures the throughput and peak memory of parsing synthetic outputs (see
+generate.py) with bop.parse() (using the lines, binary and mmap engines),
+Parser.ingest() and the bop command. Each measurement runs in a fresh
+process, so that peak memory use is not inflated by the ones before it.
+
+Usage:   python benchmarks/run.py [options]
+
+Use --save to record the results as a baseline, and --compare to check
+for regressions against a baseline recorded on the same machine:
+
+    python benchmarks/run.py --size 16M --compare benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from generate import SHAPES, parse_size, write_output  # noqa
+
+TARGETS = ['parse', 'binary', 'mmap', 'ingest', 'cli']
+MIB = 1024.0 ** 2
+
+
+def peak_rss_mib(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in KiB on Linux, and in bytes on macOS.
+    peak = resource.getrusage(who).ru_maxrss
+    if sys.platform == 'darwin':
+        peak //= 1024
+    return peak / 1024.0
+
+
+def run_parse(path, weighted):
+    import bop
+    with open(path) as f:
+        return bop.parse(f, weighted=weighted)
+
+
+def run_binary(path, weighted):
+    import bop
+    return bop.parse(path, weighted=weighted, binary=True)
+
+
+def run_mmap(path, weighted):
+    import bop
+    return bop.parse(path, weighted=weighted, engine='mmap')
+
+
+def run_ingest(path, weighted):
+    import bop
+    parser = bop.Parser(weighted)
+    with open(path) as f:
+        for line in f:
+            parser.ingest(line)
+    parser.finalize()
+    return parser.result
+
+
+def run_cli(path, weighted):
+    command = [sys.executable, '-c', 'import bop; bop.main()', path]
+    if weighted:
+        command.append('--weighted')
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    with open(os.devnull, 'w') as devnull:
+        subprocess.check_call(command, stdout=devnull, env=env)
+
+
+def measure(target, path, weighted):
+    """
+    Runs a single target, and returns its elapsed time and peak memory.
+    """
+    run = {'parse': run_parse, 'binary': run_binary, 'mmap': run_mmap,
+           'ingest': run_ingest, 'cli': run_cli}[target]
+    start = time.time()
+    result = run(path, weighted)
+    elapsed = time.time() - start
+    if target == 'cli':
+        peak = peak_rss_mib(resource.RUSAGE_CHILDREN)
+    else:
+        peak = peak_rss_mib()
+    del result
+    return {'seconds': elapsed, 'peak_rss_mib': peak}
+
+
+def measure_in_subprocess(target, path, weighted):
+    command = [sys.executable, os.path.abspath(__file__),
+               '--measure', target, path]
+    if weighted:
+        command.append('--weighted')
+    output = subprocess.check_output(command)
+    return json.loads(output.decode('UTF-8'))
+
+
+def benchmark(shapes, targets, size, repeat):
+    """
+    Yields ``(name, stats)`` for every combination of shape and target.
+    The best of ``repeat`` runs is kept.
+    """
+    for shape in shapes:
+        fd, path = tempfile.mkstemp(suffix='.txt')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                lines = write_output(f, shape, size)
+            megabytes = os.path.getsize(path) / MIB
+            for target in targets:
+                runs = [measure_in_subprocess(target, path,
+                                              shape == 'weighted')
+                        for _ in range(repeat)]
+                seconds = min(run['seconds'] for run in runs)
+                yield '%s/%s' % (shape, target), {
+                    'lines_per_s': lines / seconds,
+                    'mb_per_s': megabytes / seconds,
+                    'peak_rss_mib': min(run['peak_rss_mib'] for run in runs),
+                }
+        finally:
+            os.remove(path)
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Yields a description of every result that is more than ``tolerance``
+    (a fraction) slower, or uses that much more memory, than the baseline.
+    """
+    for name, stats in sorted(results.items()):
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if stats['mb_per_s'] < old['mb_per_s'] * (1 - tolerance):
+            yield '%s: %.1f MB/s, was %.1f MB/s' % (
+                name, stats['mb_per_s'], old['mb_per_s'])
+        if stats['peak_rss_mib'] > old['peak_rss_mib'] * (1 + tolerance):
+            yield '%s: %.1f MiB peak RSS, was %.1f MiB' % (
+                name, stats['peak_rss_mib'], old['peak_rss_mib'])
+
+
+def main():
+    description = __doc__.strip().split('\n')[0]
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--shapes', default=','.join(sorted(SHAPES)),
+                        help='comma-separated shapes to generate')
+    parser.add_argument('--targets', default=','.join(TARGETS),
+                        help='comma-separated targets to measure')
+    parser.add_argument('--size', default='16M',
+                        help='size of each generated output (e.g., 1G)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='keep the best of this many runs')
+    parser.add_argument('--save', metavar='FILE',
+                        help='save the results as a baseline')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare the results against a baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='fraction by which results may be worse')
+    parser.add_argument('--measure', nargs=2, metavar=('TARGET', 'PATH'),
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--weighted', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        target, path = args.measure
+        json.dump(measure(target, path, args.weighted), sys.stdout)
+        return
+
+    size = parse_size(args.size)
+    results = {}
+    sys.stdout.write('%-20s %12s %10s %14s\n'
+                     % ('benchmark', 'lines/s', 'MB/s', 'peak RSS (MiB)'))
+    for name, stats in benchmark(args.shapes.split(','),
+                                 args.targets.split(','), size, args.repeat):
+        results[name] = stats
+        sys.stdout.write('%-20s %12.0f %10.2f %14.1f\n'
+                         % (name, stats['lines_per_s'], stats['mb_per_s'],
+                            stats['peak_rss_mib']))
+        sys.stdout.flush()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'size': size,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'results': results,
+            }, f, indent=4, sort_keys=True)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['size'] != size:
+            sys.stderr.write('warning: baseline was measured with %d bytes\n'
+                             % (baseline['size'],))
+        problems = list(regressions(results, baseline['results'],
+                                    args.tolerance))
+        for problem in problems:
+            sys.stderr.write('regression: %s\n' % (problem,))
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
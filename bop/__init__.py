@@ -20,11 +20,18 @@ bop - parses results from Boa's less than helpful text output
 """
 
 import re
+import sys
 
-from collections import defaultdict
+from array import array
+from collections import OrderedDict, deque
 from itertools import takewhile
 
-__all__ = ['parse']
+from .compression import is_compressed, iter_chunks, iter_lines
+from .trie import CompactNode
+
+__all__ = ['parse', 'iter_records', 'parse_multiple', 'parse_many',
+           'to_sqlite', 'open_indexed', 'sorted_records', 'diff',
+           'parse_async', 'aiter_records']
 __version__ = u'0.2.0'
 
 KEY_PATTERN = re.compile(r"""
@@ -44,16 +51,59 @@ WEIGHT_PATTERN = re.compile("""
     $ # And it must match at the end of the line.
 """, re.VERBOSE)
 
+# The same, for parsing bytes (see Parser.parse_encoded_record()).
+BYTES_KEY_PATTERN = re.compile(KEY_PATTERN.pattern.encode('ascii'),
+                               re.VERBOSE)
+BYTES_WEIGHT_PATTERN = re.compile(WEIGHT_PATTERN.pattern.encode('ascii'),
+                                  re.VERBOSE)
+
+INT_PATTERN = re.compile(r'^[-+]?\d+$')
+FLOAT_PATTERN = re.compile(r'^[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?$')
+
+# Containers used for the list case (see append_compact()).
+SEQUENCE_TYPES = (list, array)
+
+try:
+    STRING_TYPES = (basestring,)
+except NameError:
+    STRING_TYPES = (str,)
+
+ANY_HEADER_PATTERN = re.compile(r"""
+    ^\w+       # Any output variable name...
+    \[ [^=]* \] # ...followed by its keys...
+    \x20=\x20   # ...and then the value.
+""", re.VERBOSE)
+
 
 class Parser(object):
     """
     Used internally to parse Boa output and produce decent results.
+
+    Nested results are built out of ``node_type`` (by default, plain
+    dicts). If ``intern_keys`` is true, equal keys share a single string.
+    Records whose header does not match ``selector`` (a
+    :class:`~bop.selection.Selector`), if given, are discarded.
+
+    If ``encoding`` is given, the parser is given :class:`bytes` instead,
+    and only the keys and values of records that are kept are decoded,
+    according to ``errors`` (as in :meth:`bytes.decode`).
     """
-    def __init__(self, weighted=False):
+    def __init__(self, weighted=False, numeric=False, node_type=dict,
+                 intern_keys=False, encoding=None, errors='strict'):
         self.weighted = weighted
+        self.numeric = numeric
+        self.node_type = node_type
+        self.interned = {} if intern_keys else None
+        self.encoding = encoding
+        self.errors = errors
+        self.newline = '\n' if encoding is None else b'\n'
         self.buffer = []
+        # The incomplete last line given to feed().
+        self.partial = self.newline[:0]
         self.new_value_pattern = None
         self._container = None
+        self.selector = None
+        self.reset_cursor()
 
     @property
     def result(self):
@@ -61,26 +111,63 @@ class Parser(object):
             raise RuntimeError('Container type not yet determined '
                                '(parse at least one line of input)')
         self.finalize()
-        return dedefaultdictize(self._container)
+        # The container is built from plain dicts and lists, so this is not
+        # a copy: parsing more input will change the returned result!
+        return self._container
 
     @property
     def initialized(self):
         return (self._container is not None and
                 self.new_value_pattern is not None)
 
+    def reset_cursor(self):
+        """
+        Forgets the last key prefix seen, and the node it leads to. Must be
+        called whenever the container is replaced.
+        """
+        # The header of the last record up to its last key, and its keys.
+        self.cursor_head = None
+        self.cursor_prefix = None
+        # The keys of the parent of the last result added, and the parent.
+        self.cursor_keys = None
+        self.cursor_node = None
+
     def add_result(self, *args):
         assert len(args) >= 2
-        keys, value = args[:-1], args[-1]
 
-        if isinstance(self._container, list):
-            self._container.append(value)
-            return self
+        if isinstance(self._container, SEQUENCE_TYPES):
+            return self.append_value(args[-1])
+
+        self.node_at(args[:-2])[args[-2]] = args[-1]
+        return self
 
-        current_dict = self._container
-        for key in keys[:-1]:
-            current_dict = current_dict[key]
-        current_dict[keys[-1]] = value
+    def node_at(self, parents):
+        """
+        Returns the node of the container that the tuple of keys
+        ``parents`` leads to, creating any nodes missing along the way.
+        """
+        # Boa groups its output, so consecutive results usually share their
+        # parent; only walk the tree when they don't.
+        if parents == self.cursor_keys:
+            return self.cursor_node
+        node = self._container
+        for key in parents:
+            try:
+                node = node[key]
+            except KeyError:
+                node[key] = node = self.node_type()
+        self.cursor_keys = parents
+        self.cursor_node = node
+        return node
 
+    def append_value(self, value):
+        """
+        Appends a value to the list container, compactly if ``numeric``.
+        """
+        if self.numeric:
+            self._container = append_compact(self._container, value)
+        else:
+            self._container.append(value)
         return self
 
     @staticmethod
@@ -94,11 +181,19 @@ class Parser(object):
         """
         Ingest arbitrary text and add it to the buffer
         """
+        if self.encoding is not None:
+            return self.feed(text)
 
-        # Just adding text with out a new line to the buffer.
+        # Just adding text with out a new line to the buffer (unless it's
+        # the final line of input starting a brand new record).
         if len(self.buffer) > 0 and '\n' not in text:
-            self.buffer[-1] += text
-            return
+            if self.buffer[-1]:
+                self.buffer[-1] += text
+                return
+            if not self.new_value_pattern.match(text):
+                # The last line of a multiline value: a line of its own.
+                self.buffer.append(text)
+                return
 
         if not self.initialized:
             self.detect_format(text)
@@ -123,12 +218,74 @@ class Parser(object):
         self.buffer += this_line
         return self
 
+    def feed(self, chunk):
+        r"""
+        Feeds an arbitrary chunk of text to the parser. Unlike
+        :meth:`ingest`, chunks may begin and end anywhere, even in the
+        middle of a line; large chunks are the most efficient. Call
+        :meth:`close` after the last chunk.
+
+        >>> parser = Parser()
+        >>> parser.feed('counts[a] = 1\ncou').feed('nts[b] = 2').close().result
+        {'a': '1', 'b': '2'}
+        """
+        lines = (self.partial + chunk).split(self.newline)
+        self.partial = lines.pop()
+        return self.feed_lines(lines)
+
+    def feed_lines(self, lines):
+        """
+        Adds complete lines (without their newlines) to the parser, exactly
+        as if each were given to :meth:`ingest` followed by a newline.
+        """
+        for index, line in enumerate(lines):
+            if line:
+                break
+        else:
+            return self
+        if not self.initialized:
+            self.detect_format(lines[index])
+
+        # This is the hot path; avoid attribute lookups.
+        is_header = self.new_value_pattern.match
+        buffer = self.buffer
+        empty = self.partial[:0]
+        for line in lines:
+            if not line:
+                # Blank lines are ignored (see ingest()).
+                continue
+            if is_header(line):
+                if buffer:
+                    self.finalize()
+                buffer = self.buffer = [line, empty]
+            else:
+                buffer.append(line)
+                buffer.append(empty)
+        return self
+
+    def close(self):
+        """
+        Finishes parsing text given to :meth:`feed`.
+        """
+        if self.partial:
+            self.feed_lines([self.partial])
+            self.partial = self.partial[:0]
+        self.finalize()
+        return self
+
     def finalize(self):
         if not len(self.buffer):
             return
-        self.parse_line('\n'.join(self.buffer))
+        # The first line of the buffer is the record's header.
+        if self.selector is None or self.selects(self.buffer[0]):
+            self.parse_line(self.newline.join(self.buffer))
         self.buffer = []
 
+    def selects(self, header):
+        if self.encoding is None:
+            return self.selector.match(header)
+        return self.selector.match_bytes(self.encoding)(header)
+
     def segregate(self, portions):
         """
         Returns lists of this line and the rest of the lines.
@@ -150,24 +307,143 @@ class Parser(object):
         >>> Parser().parse_line('foo[] = bar').result
         ['bar']
         """
+        return self.add_record(self.parse_record(raw_line))
+
+    def parse_record(self, raw_line):
+        """
+        Parses one complete (possibly multiline) record into a tuple of
+        ``(keys, value)``, or ``(keys, identifier, weight)`` when weighted.
+
+        >>> Parser().parse_record('foo[bar][baz] = quux')
+        (('bar', 'baz'), 'quux')
+        >>> Parser().parse_record('foo[] = bar')
+        ((), 'bar')
+        >>> Parser(weighted=True).parse_record('foo[] = bar, 2')
+        ((), 'bar', '2')
+        >>> Parser(weighted=True, numeric=True).parse_record('foo[] = bar, 2')
+        ((), 'bar', 2)
+        """
+        if self.encoding is not None:
+            return self.parse_encoded_record(raw_line)
         line = raw_line.rstrip('\n')
         if not self.initialized:
             self.detect_format(line)
 
         keys_string, value = self.cleave(line)
-        _, keys = self.parse_keys(keys_string)
-        assert len(keys) > 0
+        keys = self.split_keys(keys_string)
 
         # Remove the "dummy" empty key for lists and weighted results.
-        if isinstance(self._container, dict) and keys[-1] == '':
+        if keys[-1] == '':
             keys.pop()
+        if self.interned is not None:
+            self.intern_prefix(keys, len(keys) if self.weighted else -1)
 
         if self.weighted:
             final_key, weight = self.parse_weight(value)
-            self.add_result(*(keys + [final_key, weight]))
+            if self.numeric:
+                weight = to_number(weight)
+            return (tuple(keys), final_key, weight)
+        if self.numeric:
+            value = to_number(value)
+        return (tuple(keys), value)
+
+    def parse_encoded_record(self, raw_line):
+        r"""
+        Like :meth:`parse_record`, but for :class:`bytes`: the record is
+        split into keys and values first, and only then are they decoded.
+
+        >>> parser = Parser(encoding='UTF-8', errors='replace')
+        >>> parser.parse_encoded_record(b'foo[bar] = caf\xc3\xa9 \xff\n')
+        (('bar',), 'café \ufffd')
+        """
+        if b'\r' in raw_line:
+            raw_line = raw_line.replace(b'\r\n', b'\n')
+        line = raw_line.rstrip(b'\n')
+        if not self.initialized:
+            self.detect_format(line)
+
+        left, right = line.split(b'=', 1)
+        assert left.endswith(b' ') and right.startswith(b' ')
+        encoding, errors = self.encoding, self.errors
+        keys = self.split_keys(left[:-1], BYTES_KEY_PATTERN.findall)
+        if keys[-1] == '':
+            keys.pop()
+        if self.interned is not None:
+            self.intern_prefix(keys, len(keys) if self.weighted else -1)
+
+        if self.weighted:
+            match = BYTES_WEIGHT_PATTERN.search(right[1:])
+            assert match
+            final_key, weight = match.group(1, 2)
+            final_key = final_key.decode(encoding, errors)
+            weight = weight.decode(encoding, errors)
+            if self.numeric:
+                weight = to_number(weight)
+            return (tuple(keys), final_key, weight)
+        value = right[1:].decode(encoding, errors)
+        if self.numeric:
+            value = to_number(value)
+        return (tuple(keys), value)
+
+    def split_keys(self, keys_string, findall=KEY_PATTERN.findall):
+        """
+        Returns a list of the keys in the header ``keys_string``, decoded if
+        it is :class:`bytes`. Consecutive records usually share all but
+        their last key, so only the last key of a record is split off when
+        the rest of its header is the same as that of the previous record.
+
+        >>> parser = Parser()
+        >>> parser.split_keys('counts[a][b]')
+        ['a', 'b']
+        >>> parser.split_keys('counts[a][c]')
+        ['a', 'c']
+        """
+        encoding = self.encoding
+        cut = keys_string.rfind('[' if encoding is None else b'[')
+        head = self.cursor_head
+        if (head is not None and cut == len(head) and
+                keys_string.startswith(head)):
+            last = keys_string[cut + 1:-1]
+            if encoding is not None:
+                last = last.decode(encoding, self.errors)
+            return self.cursor_prefix + [last]
+
+        keys = findall(keys_string)
+        assert len(keys) > 0
+        # Unless the last key itself contains a bracket, remember the rest.
+        if keys[-1] == keys_string[cut + 1:-1]:
+            self.cursor_head = keys_string[:cut]
         else:
-            self.add_result(*(keys + [value]))
-        return self
+            self.cursor_head = None
+        if encoding is not None:
+            keys = [key.decode(encoding, self.errors) for key in keys]
+        self.cursor_prefix = keys[:-1]
+        return keys
+
+    def add_record(self, record):
+        """
+        Adds a record, as returned by :meth:`parse_record`, to the container.
+        """
+        if isinstance(self._container, SEQUENCE_TYPES):
+            return self.append_value(record[-1])
+        keys = record[0]
+        return self.add_result(*(keys + record[1:]))
+
+    def intern_prefix(self, keys, end=-1):
+        """
+        Replaces the keys (except for the last, by default) with a string
+        shared with every equal key seen before. The final key of a record
+        is usually unique (e.g., a timestamp), so it is not worth keeping.
+
+        >>> parser = Parser(intern_keys=True)
+        >>> first, second = ['a' * 10, 'b'], ['a' * 10, 'c']
+        >>> _ = parser.intern_prefix(first), parser.intern_prefix(second)
+        >>> first[0] is second[0]
+        True
+        """
+        intern = self.interned.setdefault
+        keys[:end] = [intern(key, key) for key in keys[:end]]
+        return keys
 
     @staticmethod
     def parse_keys(keys_string):
@@ -197,19 +473,27 @@ class Parser(object):
         >>> isinstance(parser.result, dict)
         True
         """
+        if self.encoding is not None:
+            line = line.decode(self.encoding, self.errors)
         keys_string, _ = self.cleave(line)
         varname, keys = self.parse_keys(keys_string)
 
         # Create a regex from the varname
-        self.new_value_pattern = re.compile('^' + re.escape(varname) + '\[')
+        if self.encoding is None:
+            self.new_value_pattern = re.compile('^' + re.escape(varname) +
+                                                r'\[')
+        else:
+            varname = varname.encode(self.encoding)
+            self.new_value_pattern = re.compile(b'^' + re.escape(varname) +
+                                                br'\[')
 
         if not self.weighted and keys[0] == '':
             # It's a simple list.
             self._container = []
         else:
-            # Create a dictionary capable of autovivification.
-            vivify = lambda: defaultdict(vivify)
-            self._container = vivify()
+            # Nested dictionaries are created as needed by add_result().
+            self._container = self.node_type()
+        self.reset_cursor()
 
         return self
 
@@ -222,24 +506,155 @@ class Parser(object):
     def parse(self, iterator):
         for line in iterator:
             self.ingest(line)
+        if self.partial:
+            # Only for bytes (see ingest()).
+            self.close()
         assert self._container is not None
 
 
-def dedefaultdictize(d):
+class RecordParser(Parser):
     """
-    >>> vivify = lambda: defaultdict(vivify)
-    >>> d = vivify()
-    >>> d['foo'][0]['bar'] = 'baz'
-    >>> d['foo'][1] = 'quux'
-    >>> dedefaultdictize(d)
-    {'foo': {0: {'bar': 'baz'}, 1: 'quux'}}
+    A parser that queues complete records instead of adding them to a
+    container. Used internally by :func:`iter_records`.
     """
-    if not isinstance(d, dict):
-        return d
-    return {k: dedefaultdictize(v) for k, v in d.items()}
+    def __init__(self, weighted=False, numeric=False, intern_keys=False,
+                 encoding=None, errors='strict'):
+        super(RecordParser, self).__init__(weighted, numeric,
+                                           intern_keys=intern_keys,
+                                           encoding=encoding, errors=errors)
+        self.records = deque()
+
+    def add_record(self, record):
+        self.records.append(record)
+        return self
+
+    def drain(self):
+        """
+        Yields (and forgets) every record completed so far.
+        """
+        records = self.records
+        while records:
+            yield records.popleft()
 
 
-def parse(string_iter, weighted=False):
+class MultiParser(Parser):
+    r"""
+    Parses output containing several output variables, delegating the
+    records of each variable to its own :class:`Parser`.
+
+    >>> parser = MultiParser(weighted={'totals'})
+    >>> parser.parse(['counts[] = a\n', 'totals[] = b, 2\n'])
+    >>> sorted(parser.result.items())
+    [('counts', ['a']), ('totals', {'b': '2'})]
+    """
+    def __init__(self, weighted=False, numeric=False):
+        super(MultiParser, self).__init__(weighted, numeric)
+        self.new_value_pattern = ANY_HEADER_PATTERN
+        self._container = OrderedDict()
+
+    @property
+    def result(self):
+        self.finalize()
+        return OrderedDict((varname, parser.result)
+                           for varname, parser in self._container.items())
+
+    def is_weighted(self, varname):
+        """
+        Whether the given variable is weighted: ``weighted`` is either a
+        :class:`bool` for every variable, or a collection of variable names.
+        """
+        if isinstance(self.weighted, bool):
+            return self.weighted
+        return varname in self.weighted
+
+    def parse_line(self, raw_line):
+        varname = raw_line.split('[', 1)[0]
+        parser = self._container.get(varname)
+        if parser is None:
+            parser = Parser(self.is_weighted(varname), self.numeric)
+            self._container[varname] = parser
+        parser.parse_line(raw_line)
+        return self
+
+    def detect_format(self, line):
+        # Each variable's parser detects its own format.
+        return self
+
+
+def make_parser(weighted=False, numeric=False, compact=False, reduce=None,
+                top_k=None, select=None, encoding=None, errors='strict'):
+    """
+    Returns a :class:`Parser` configured with the options of :func:`parse`.
+    The parser is given :class:`bytes` if ``encoding`` is given.
+    """
+    node_type = CompactNode if compact else dict
+    if reduce is not None or top_k is not None:
+        from .aggregate import AggregatingParser
+        if not weighted:
+            raise ValueError('reduce and top_k require weighted output')
+        parser = AggregatingParser(reduce, top_k, node_type, encoding, errors)
+    else:
+        parser = Parser(weighted, numeric, node_type=node_type,
+                        encoding=encoding, errors=errors)
+    if select is not None:
+        from .selection import Selector
+        parser.selector = Selector(select)
+    return parser
+
+
+def to_number(string):
+    """
+    Converts a string to an :class:`int` or a :class:`float` if it looks
+    like one; otherwise, returns the string unchanged.
+
+    >>> to_number('78'), to_number('-1.5e3'), to_number('nan')
+    (78, -1500.0, 'nan')
+    """
+    if INT_PATTERN.match(string):
+        return int(string)
+    elif FLOAT_PATTERN.match(string):
+        return float(string)
+    return string
+
+
+def append_compact(container, value):
+    """
+    Appends a value to a sequence, returning the (possibly new) sequence.
+    Sequences of only integers or only floats are stored in a compact
+    :class:`array.array`; anything else falls back to a :class:`list`.
+
+    >>> append_compact(append_compact([], 1), 2)
+    array('l', [1, 2])
+    >>> append_compact(append_compact([], 1), 'herp')
+    [1, 'herp']
+    """
+    if isinstance(container, array):
+        try:
+            container.append(value)
+            return container
+        except (TypeError, OverflowError):
+            container = list(container)
+    elif not container:
+        if isinstance(value, bool):
+            pass
+        elif isinstance(value, int):
+            container = array('l')
+            try:
+                container.append(value)
+                return container
+            except OverflowError:
+                container = []
+        elif isinstance(value, float):
+            return array('d', [value])
+
+    container.append(value)
+    return container
+
+
+def parse(string_iter, weighted=False, engine='lines', workers=None,
+          numeric=False, compact=False, cache_dir=None, stats=None,
+          reduce=None, top_k=None, select=None, binary=False,
+          encoding='UTF-8', errors='strict'):
     r"""
     Given an iterator that yields strings (like a file object), returns the
     parsed results. The results may be returned as a list if there are no
@@ -255,41 +670,453 @@ def parse(string_iter, weighted=False):
     Weighted data is always returned as a dictionary, with the "identifier" as
     the keys, and the weight as the values.
 
-    :param string_iter: A string or an iterator that yields strings, such as
+    Normally, only the last weight of an identifier is kept. If ``reduce``
+    is ``'sum'``, ``'max'``, ``'min'`` or ``'count'``, all of its weights
+    (which are converted to numbers) are combined instead. If ``top_k`` is
+    given, only the identifiers with the ``top_k`` largest weights are
+    kept (see :class:`~bop.aggregate.AggregatingParser`).
+
+    If ``select`` is given, only records under the given key paths are
+    parsed; every other record is discarded as soon as its header is found.
+    ``select`` is a key path prefix, a compiled regular expression, or a
+    list of them. A key path is a tuple of keys, or a string of bracketed
+    keys (e.g., ``'[http://example.org/project][*.java]'``); each key may
+    contain ``*`` and ``?`` wildcards. See :class:`~bop.selection.Selector`.
+
+    If ``binary`` is ``True``, ``string_iter`` must instead yield
+    :class:`bytes` (lines, or chunks split anywhere), such as a file opened
+    in binary mode; when given a path, the file is read as bytes. Records
+    are found and split into keys and values before anything is decoded,
+    and only the records that are kept are decoded, using ``encoding`` and
+    the ``errors`` policy of :meth:`bytes.decode` (e.g., ``'replace'``, so
+    that a stray invalid byte does not abort the parse).
+
+    If ``engine`` is ``'mmap'``, ``string_iter`` must instead be a seekable
+    file object; the file is memory-mapped and every record is found with a
+    single regular expression scan (see :mod:`bop.buffer`). This is much
+    faster for large files and gives identical results.
+
+    If ``numeric`` is ``True``, values and weights that look like numbers
+    are converted to :class:`int` or :class:`float`, and a list of numbers
+    is returned as a compact :class:`array.array`.
+
+    If ``compact`` is ``True``, nested results are built from
+    :class:`~bop.trie.CompactNode` objects: mappings that use less memory
+    than dictionaries when most nodes have only a few children (convert
+    them with :meth:`~bop.trie.CompactNode.to_dict` to serialize them as
+    JSON).
+
+    If ``workers`` is given, ``string_iter`` must instead be a path (or a
+    file object opened from a path); the file is split at record boundaries
+    and the pieces are parsed by a pool of ``workers`` processes (see
+    :mod:`bop.parallel`).
+
+    If ``string_iter`` is a path, the file may be compressed with gzip,
+    bzip2, or xz; it is decompressed in a background thread while parsing
+    (see :mod:`bop.compression`). Compressed files are always parsed
+    sequentially by the ``'lines'`` engine.
+
+    If ``cache_dir`` is given, ``string_iter`` must instead be a path (or a
+    file object opened from a path); the result is cached on disk, and later
+    calls for the same, unmodified file load it instead of parsing again.
+    ``cache_dir`` may also be a :class:`~bop.cache.ResultCache`, e.g., to
+    configure its maximum size.
+
+    If ``stats`` is given, it is a :class:`~bop.stats.ParseStats` that
+    counts lines, records, etc. and times each phase of parsing. Only the
+    ``'lines'`` engine can collect stats, or use ``reduce`` or ``top_k``
+    (without ``workers`` or ``cache_dir``).
+
+    :param string_iter: A path, or an iterator that yields strings, such as
                         a :any:`file` object.
     :param bool weighted: Whether the output consists of weights.
+    :param str engine: ``'lines'`` (the default) or ``'mmap'``.
+    :param int workers: The number of processes to parse with.
+    :param bool numeric: Whether to convert numeric values and weights.
+    :param bool compact: Whether to build compact nested results.
+    :param str cache_dir: Where to cache results.
+    :param stats: Where to collect statistics.
+    :type stats: :class:`~bop.stats.ParseStats`
+    :param str reduce: How to combine the weights of each identifier.
+    :param int top_k: How many identifiers to keep under each key.
+    :param select: Which records to parse.
+    :param bool binary: Whether to parse bytes.
+    :param str encoding: The encoding of the bytes.
+    :param str errors: How to handle bytes that cannot be decoded.
     :return: parsed Boa output
-    :rtype: :py:class:`dict` or :py:class:`list`
+    :rtype: :py:class:`dict`, :py:class:`list`, or :py:class:`array.array`
 
     """
-    parser = Parser(weighted)
+    lines_only = (stats, reduce, top_k, binary or None)
+    if (any(option is not None for option in lines_only) and
+            (cache_dir is not None or workers is not None or
+             engine != 'lines')):
+        raise ValueError('stats, reduce, top_k and binary require the lines '
+                         'engine')
+    if select is not None and cache_dir is not None:
+        raise ValueError('Selected results cannot be cached')
+
+    if cache_dir is not None:
+        from .cache import parse_cached
+        return parse_cached(string_iter, cache_dir, weighted, numeric,
+                            compact, engine=engine, workers=workers)
+
+    path = string_iter if isinstance(string_iter, STRING_TYPES) else None
+    if path is not None and is_compressed(path):
+        # Compressed files can only be read from start to finish.
+        engine, workers = 'lines', None
+
+    if workers is not None:
+        from .parallel import parse_parallel
+        return parse_parallel(string_iter, weighted, workers,
+                              numeric=numeric, compact=compact,
+                              select=select)
+    elif engine == 'mmap':
+        from .buffer import parse_mapped
+        if path is not None:
+            with open(path, 'rb') as f:
+                return parse_mapped(f, weighted, numeric=numeric,
+                                    compact=compact, select=select)
+        return parse_mapped(string_iter, weighted, numeric=numeric,
+                            compact=compact, select=select)
+    elif engine != 'lines':
+        raise ValueError('Unknown engine: %r' % (engine,))
+
+    if not binary:
+        encoding = None
+    if path is not None:
+        string_iter = iter_chunks(path) if binary else iter_lines(path)
+    parser = make_parser(weighted, numeric, compact, reduce, top_k, select,
+                         encoding, errors)
+    if stats is not None:
+        stats.attach(parser)
     parser.parse(string_iter)
     return parser.result
 
 
+def iter_records(string_iter, weighted=False, numeric=False,
+                 intern_keys=False, stats=None, select=None, binary=False,
+                 encoding='UTF-8', errors='strict'):
+    r"""
+    Like :func:`parse`, but lazily yields each record as soon as it is
+    complete, without building the nested result. Each record is a tuple of
+    ``(keys, value)``, where ``keys`` is a tuple of the bracketed keys;
+    weighted records are instead ``(keys, identifier, weight)``.
+
+    >>> list(iter_records(['counts[a][b] = 1\n', 'counts[a][c] = 2\n']))
+    [(('a', 'b'), '1'), (('a', 'c'), '2')]
+    >>> list(iter_records(['licenses[] = MIT, 3\n'], weighted=True))
+    [((), 'MIT', '3')]
+
+    :param string_iter: A path (see :func:`parse`), or an iterator that
+                        yields strings, such as a :any:`file` object.
+    :param bool weighted: Whether the output consists of weights.
+    :param bool numeric: Whether to convert numeric values and weights.
+    :param bool intern_keys: Whether equal keys should share one string;
+                             worthwhile when keeping many records around.
+    :param stats: Where to collect statistics (see :func:`parse`).
+    :type stats: :class:`~bop.stats.ParseStats`
+    :param select: Which records to yield (see :func:`parse`).
+    :param bool binary: Whether to parse bytes (see :func:`parse`).
+    :param str encoding: The encoding of the bytes.
+    :param str errors: How to handle bytes that cannot be decoded.
+    :return: an iterator of records
+    """
+    if isinstance(string_iter, STRING_TYPES):
+        string_iter = (iter_chunks(string_iter) if binary
+                       else iter_lines(string_iter))
+    parser = RecordParser(weighted, numeric, intern_keys,
+                          encoding if binary else None, errors)
+    if select is not None:
+        from .selection import Selector
+        parser.selector = Selector(select)
+    if stats is not None:
+        stats.attach(parser)
+    for line in string_iter:
+        parser.ingest(line)
+        if parser.records:
+            for record in parser.drain():
+                yield record
+    parser.close()
+    for record in parser.drain():
+        yield record
+
+
+def parse_multiple(string_iter, weighted=False, numeric=False):
+    r"""
+    Parses output that contains records for several output variables in
+    one pass, returning a dictionary mapping each variable name to its
+    results (exactly as :func:`parse` would return them).
+
+    >>> results = parse_multiple(['counts[a] = 1\n', 'totals[] = 2\n'])
+    >>> list(results.items())
+    [('counts', {'a': '1'}), ('totals', ['2'])]
+
+    :param string_iter: A path (see :func:`parse`), or an iterator that
+                        yields strings, such as a :any:`file` object.
+    :param weighted: Either a :class:`bool` that applies to all variables,
+                     or a collection of the names of the weighted variables.
+    :param bool numeric: Whether to convert numeric values and weights.
+    :return: parsed Boa output for each variable
+    :rtype: :py:class:`collections.OrderedDict`
+    """
+    if isinstance(string_iter, STRING_TYPES):
+        string_iter = iter_lines(string_iter)
+    parser = MultiParser(weighted, numeric)
+    parser.parse(string_iter)
+    return parser.result
+
+
+def parse_many(paths, *args, **kwargs):
+    """
+    Parses several files concurrently, merging their results; see
+    :func:`bop.parallel.parse_many`.
+    """
+    from .parallel import parse_many
+    return parse_many(paths, *args, **kwargs)
+
+
+def to_sqlite(string_iter, db_path, *args, **kwargs):
+    """
+    Parses Boa output into an SQLite database; see
+    :func:`bop.database.to_sqlite`.
+    """
+    from .database import to_sqlite
+    return to_sqlite(string_iter, db_path, *args, **kwargs)
+
+
+def open_indexed(path, *args, **kwargs):
+    """
+    Returns a mapping of the first-level keys of the output at ``path`` to
+    their lazily parsed subtrees; see :func:`bop.index.open_indexed`.
+    """
+    from .index import open_indexed
+    return open_indexed(path, *args, **kwargs)
+
+
+def sorted_records(string_iter, *args, **kwargs):
+    """
+    Yields the records of the output sorted by their keys, spilling to disk
+    to stay within a memory budget; see :func:`bop.sort.sorted_records`.
+    """
+    from .sort import sorted_records
+    return sorted_records(string_iter, *args, **kwargs)
+
+
+def diff(old, new, *args, **kwargs):
+    """
+    Yields the records that were added, removed or changed between two
+    outputs; see :func:`bop.compare.diff`.
+    """
+    from .compare import diff
+    return diff(old, new, *args, **kwargs)
+
+
+def parse_async(stream, *args, **kwargs):
+    """
+    Returns a coroutine that parses Boa output read from an asyncio stream
+    or async iterable; see :func:`bop.aio.parse_async`. Python 3.6+ only.
+    """
+    from .aio import parse_async
+    return parse_async(stream, *args, **kwargs)
+
+
+def aiter_records(stream, *args, **kwargs):
+    """
+    Returns an async iterator over the records of Boa output read from an
+    asyncio stream or async iterable; see :func:`bop.aio.aiter_records`.
+    Python 3.6+ only.
+    """
+    from .aio import aiter_records
+    return aiter_records(stream, *args, **kwargs)
+
+
+if sys.version_info < (3, 6):
+    __all__ = __all__[:-2]
+
+
 def main():
     import sys
     import json
+    from argparse import ArgumentParser
+
+    if sys.argv[1:2] == ['sqlite']:
+        from .database import main as sqlite_main
+        return sqlite_main(sys.argv[2:])
+    if sys.argv[1:2] == ['diff']:
+        from .compare import main as diff_main
+        sys.exit(diff_main(sys.argv[2:]))
 
-    # Copy the argument vector; we'll modify the list below.
-    args = sys.argv[:]
+    from .cache import DEFAULT_MAX_SIZE, ResultCache, default_cache_dir
+    from .stats import ParseStats
 
-    if len(args) < 2:
-        sys.stderr.write("Usage:   bop [--weighted] output.txt\n")
-        sys.exit(-1)
+    arg_parser = ArgumentParser(prog='bop', description=__doc__.strip())
+    arg_parser.add_argument('filenames', metavar='output.txt', nargs='+',
+                            help='one or more outputs; the results of '
+                                 'several outputs are merged')
+    arg_parser.add_argument('--weighted', action='store_true',
+                            help='the values are affixed with weights')
+    arg_parser.add_argument('--encoding', default='UTF-8',
+                            help='the encoding of the outputs '
+                                 '(default: %(default)s)')
+    arg_parser.add_argument('--errors', default='strict',
+                            choices=('strict', 'replace', 'ignore',
+                                     'backslashreplace', 'surrogateescape'),
+                            help='how to handle bytes that cannot be '
+                                 'decoded (default: %(default)s)')
+    arg_parser.add_argument('--on-conflict', default='error',
+                            choices=('error', 'last', 'sum', 'list'),
+                            help='how to merge values with the same keys in '
+                                 'several outputs (default: %(default)s)')
+    arg_parser.add_argument('--workers', type=int,
+                            help='how many outputs to parse at once '
+                                 '(default: one per CPU)')
+    arg_parser.add_argument('--format', default='json',
+                            choices=('json', 'ndjson', 'json-stream'),
+                            help='ndjson and json-stream are written while '
+                                 'parsing, using very little memory (several '
+                                 'outputs are merged with --sort)')
+    arg_parser.add_argument('--cache', action='store_true',
+                            help='cache the parsed results on disk')
+    arg_parser.add_argument('--cache-dir', default=default_cache_dir(),
+                            help='where to cache results '
+                                 '(default: %(default)s)')
+    arg_parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_SIZE,
+                            help='maximum size of the cache, in bytes')
+    arg_parser.add_argument('--reduce', choices=('sum', 'max', 'min', 'count'),
+                            help='combine the weights of each identifier '
+                                 '(implies --weighted)')
+    arg_parser.add_argument('--top-k', type=int, metavar='K',
+                            help='keep only the K identifiers with the '
+                                 'largest weights (implies --weighted)')
+    arg_parser.add_argument('--select', action='append', metavar='KEYS',
+                            help='only parse records under these keys, '
+                                 'e.g., "[project][*.java]" (repeatable)')
+    arg_parser.add_argument('--select-regex', action='append',
+                            metavar='REGEX', type=re.compile,
+                            help='only parse records whose keys (e.g., '
+                                 '"[project][file]") match (repeatable)')
+    arg_parser.add_argument('--stats', action='store_true',
+                            help='print counts and timings to stderr')
+    arg_parser.add_argument('--progress', action='store_true',
+                            help='print progress to stderr while parsing')
+    arg_parser.add_argument('--sort', action='store_true',
+                            help='write the records sorted by their keys, '
+                                 'spilling to temporary files when they do '
+                                 'not fit in --max-memory')
+    arg_parser.add_argument('--max-memory', default='256M', metavar='SIZE',
+                            help='how much memory to sort in, e.g., 64M '
+                                 '(default: %(default)s)')
+    args = arg_parser.parse_args()
 
-    weighted = False
-    if '--weighted' in args:
-        weighted = True
-        args.remove('--weighted')
+    several = len(args.filenames) > 1
+    if several and (args.cache or args.stats or args.progress or
+                    args.reduce is not None or args.top_k is not None):
+        arg_parser.error('--cache, --stats, --progress, --reduce and '
+                         '--top-k require a single output')
 
-    _, filename = args
+    # Outputs are read as bytes; only the records kept are decoded.
+    decoding = dict(binary=True, encoding=args.encoding, errors=args.errors)
+    if args.cache and (args.encoding != 'UTF-8' or args.errors != 'strict'):
+        arg_parser.error('--encoding and --errors cannot be used with '
+                         '--cache')
 
-    with open(filename) as f:
-        results = parse(f, weighted)
+    if args.reduce is not None or args.top_k is not None:
+        if args.format != 'json' or args.cache:
+            arg_parser.error('--reduce and --top-k require --format=json, '
+                             'without --cache')
+        args.weighted = True
+
+    select = (args.select or []) + (args.select_regex or [])
+    if not select:
+        select = None
+    elif args.cache:
+        arg_parser.error('--select cannot be used with --cache')
+
+    stats = None
+    if args.stats or args.progress:
+        if args.cache:
+            arg_parser.error('--stats and --progress cannot be used with '
+                             '--cache')
+        stats = ParseStats(progress=report_progress if args.progress else None)
+
+    if args.sort and (args.cache or args.reduce is not None or
+                      args.top_k is not None):
+        arg_parser.error('--sort cannot be used with --cache, --reduce or '
+                         '--top-k')
+    if several and (args.sort or args.format != 'json'):
+        # Records are merged by sorting them, which keeps the last value.
+        if args.on_conflict != 'last':
+            arg_parser.error('--sort, --format=ndjson and '
+                             '--format=json-stream keep the last value of '
+                             'the same keys in several outputs; pass '
+                             '--on-conflict=last')
+        args.sort = True
+
+    if args.format != 'json' or args.sort:
+        from .output import (write_ndjson, write_json_stream,
+                              UngroupedRecords)
+        if args.cache:
+            arg_parser.error('--cache requires --format=json')
+        write = write_ndjson if args.format == 'ndjson' else write_json_stream
+        records = (record for filename in args.filenames
+                   for record in iter_records(filename, args.weighted,
+                                              stats=stats, select=select,
+                                              **decoding))
+        if args.sort:
+            from .sort import sort_records, parse_size
+            try:
+                max_memory = parse_size(args.max_memory)
+            except ValueError:
+                arg_parser.error('invalid --max-memory: %r'
+                                 % (args.max_memory,))
+            records = sort_records(records, args.weighted, max_memory)
+        try:
+            write(records, sys.stdout, args.weighted)
+        except UngroupedRecords as error:
+            arg_parser.exit(1, '\nbop: %s\n' % (error,))
+        if args.format != 'ndjson':
+            sys.stdout.write('\n')
+        report_stats(args, stats)
+        return
+
+    filename = args.filenames[0]
+    if several:
+        from .parallel import MergeConflict
+        try:
+            results = parse_many(args.filenames, args.weighted, args.workers,
+                                 args.on_conflict, select=select, **decoding)
+        except MergeConflict as error:
+            arg_parser.exit(1, 'bop: %s (see --on-conflict)\n' % (error,))
+    elif args.cache:
+        cache = ResultCache(args.cache_dir, max_size=args.cache_size)
+        results = parse(filename, args.weighted, cache_dir=cache)
+    else:
+        results = parse(filename, args.weighted, stats=stats,
+                        reduce=args.reduce, top_k=args.top_k, select=select,
+                        **decoding)
+    report_stats(args, stats)
 
     sys.stdout.write(json.dumps(results, indent=4, separators=(', ', ': ')))
     sys.stdout.write('\n')
 
+
+def report_progress(stats):
+    import sys
+    elapsed = stats.elapsed or float('inf')
+    sys.stderr.write('\r%d records, %d lines, %.2f MB/s'
+                     % (stats.records, stats.lines,
+                        stats.bytes / 1e6 / elapsed))
+    sys.stderr.flush()
+
+
+def report_stats(args, stats):
+    import sys
+    if args.progress:
+        report_progress(stats)
+        sys.stderr.write('\n')
+    if args.stats:
+        sys.stderr.write(stats.summary() + '\n')
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Folds the weights of weighted output as records arrive, instead of
+keeping only the last weight seen for each identifier.
+"""
+
+import heapq
+from itertools import count
+
+from . import Parser, STRING_TYPES
+
+__all__ = ['AggregatingParser', 'REDUCTIONS']
+
+REDUCTIONS = {
+    'sum': lambda total, weight: total + weight,
+    'max': max,
+    'min': min,
+    'count': lambda total, weight: total + 1,
+}
+
+
+class AggregatingParser(Parser):
+    r"""
+    Parses weighted output, combining the weights of each identifier with
+    ``reduce`` (``'sum'``, ``'max'``, ``'min'`` or ``'count'``). Weights are
+    always converted to numbers.
+
+    >>> parser = AggregatingParser(reduce='sum')
+    >>> parser.parse(['licenses[] = MIT, 3\n', 'licenses[] = GPL, 1\n',
+    ...               'licenses[] = MIT, 2\n'])
+    >>> sorted(parser.result.items())
+    [('GPL', 1), ('MIT', 5)]
+
+    If ``top_k`` is given, only the ``top_k`` identifiers with the largest
+    weights are kept under each key, in decreasing order of weight. Without
+    ``reduce``, each key keeps a heap of only ``top_k`` identifiers, so
+    memory is O(k). A repeated identifier replaces its entry with its last
+    weight, as :func:`bop.parse` would, but identifiers already dropped
+    from the heap are not brought back if that weight falls. With
+    ``reduce``, every identifier is folded until the result is requested,
+    which costs O(n) memory. Either way, parse all of the input first.
+
+    >>> parser = AggregatingParser(top_k=1)
+    >>> parser.parse(['licenses[] = MIT, 3\n', 'licenses[] = GPL, 4\n'])
+    >>> parser.result
+    {'GPL': 4}
+    """
+    def __init__(self, reduce=None, top_k=None, node_type=dict,
+                 encoding=None, errors='strict'):
+        super(AggregatingParser, self).__init__(weighted=True, numeric=True,
+                                                node_type=node_type,
+                                                encoding=encoding,
+                                                errors=errors)
+        if reduce is not None and reduce not in REDUCTIONS:
+            raise ValueError('Unknown reduction: %r' % (reduce,))
+        if top_k is not None and top_k < 1:
+            raise ValueError('top_k must be positive: %r' % (top_k,))
+        self.reduce = reduce
+        self.fold = REDUCTIONS.get(reduce)
+        self.top_k = top_k
+        # The keys of every group of identifiers not yet ranked.
+        self.groups = set()
+        # Without reduce: the heap of each group, and its entries by
+        # identifier. Entries are [weight, -order, identifier], so the
+        # smallest weight is dropped first, and the latest of equal ones.
+        self.heaps = {}
+        self.order = count()
+
+    @property
+    def result(self):
+        result = super(AggregatingParser, self).result
+        if not self.groups:
+            return result
+        for keys in self.groups:
+            self.rank(keys)
+        self.groups.clear()
+        self.heaps.clear()
+        self.reset_cursor()
+        return self._container
+
+    def rank(self, keys):
+        """
+        Replaces the group of identifiers under ``keys`` with its ``top_k``
+        largest, in decreasing order of weight (earlier identifiers win
+        ties).
+        """
+        ranked = self.node_type()
+        if keys in self.heaps:
+            heap, _ = self.heaps[keys]
+            for weight, _, identifier in sorted(heap, reverse=True):
+                ranked[identifier] = weight
+        else:
+            group = self.node_at(keys)
+            for identifier, weight in heapq.nlargest(
+                    self.top_k, group.items(), key=lambda item: item[1]):
+                ranked[identifier] = weight
+        if keys:
+            self.node_at(keys[:-1])[keys[-1]] = ranked
+        else:
+            self._container = ranked
+        self.reset_cursor()
+
+    def add_record(self, record):
+        keys, identifier, weight = record
+        if isinstance(weight, STRING_TYPES):
+            raise ValueError('Weight is not a number: %r' % (weight,))
+        if self.reduce == 'count':
+            weight = 1
+
+        group = self.node_at(keys)
+        if self.top_k is not None and self.fold is None:
+            self.push(keys, identifier, weight)
+            return self
+        if self.fold is not None and identifier in group:
+            weight = self.fold(group[identifier], weight)
+        group[identifier] = weight
+        if self.top_k is not None:
+            self.groups.add(keys)
+        return self
+
+    def push(self, keys, identifier, weight):
+        """
+        Adds the last weight of ``identifier`` to the heap of the group
+        under ``keys``, dropping the smallest entry beyond ``top_k``.
+        """
+        self.groups.add(keys)
+        heap, entries = self.heaps.setdefault(keys, ([], {}))
+        entry = entries.get(identifier)
+        if entry is not None:
+            entry[0] = weight
+            heapq.heapify(heap)
+            return
+        entry = [weight, -next(self.order), identifier]
+        if len(heap) < self.top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            del entries[heapq.heapreplace(heap, entry)[2]]
+        else:
+            return
+        entries[identifier] = entry
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Parses Boa output from asyncio streams (Python 3.6+ only).
+"""
+
+import asyncio
+import codecs
+
+from . import RecordParser, make_parser
+
+__all__ = ['parse_async', 'aiter_records']
+
+CHUNK_SIZE = 1024 * 1024
+
+
+async def aiter_text(stream, encoding='UTF-8', chunk_size=CHUNK_SIZE):
+    """
+    Yields chunks of text from an :class:`asyncio.StreamReader` (or any
+    object with a coroutine ``read(n)`` method), or from an asynchronous
+    iterator of :class:`bytes` or :class:`str`. Bytes are decoded
+    incrementally, so a multibyte character may be split between chunks.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+
+    if hasattr(stream, 'read'):
+        while True:
+            chunk = await stream.read(chunk_size)
+            if not chunk:
+                break
+            yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+    else:
+        async for chunk in stream:
+            yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+
+    rest = decoder.decode(b'', final=True)
+    if rest:
+        yield rest
+
+
+async def feed(parser, text, offload, executor):
+    if offload:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(executor, parser.feed, text)
+    else:
+        parser.feed(text)
+
+
+async def parse_async(stream, weighted=False, numeric=False, compact=False,
+                      encoding='UTF-8', offload=False, executor=None):
+    """
+    Like :func:`bop.parse`, but reads ``stream`` asynchronously. See
+    :func:`aiter_text` for the kinds of streams accepted.
+
+    If ``offload`` is true, each chunk is parsed in ``executor`` (by
+    default, the event loop's default executor) rather than in the event
+    loop itself. Since chunks are parsed one at a time, this should be a
+    thread pool.
+
+    :return: parsed Boa output
+    """
+    parser = make_parser(weighted, numeric, compact)
+    async for text in aiter_text(stream, encoding):
+        await feed(parser, text, offload, executor)
+    parser.close()
+    return parser.result
+
+
+async def aiter_records(stream, weighted=False, numeric=False,
+                        encoding='UTF-8', offload=False, executor=None):
+    """
+    Like :func:`bop.iter_records`, but reads ``stream`` asynchronously,
+    yielding each record as soon as it is complete. The other arguments
+    are as for :func:`parse_async`.
+    """
+    parser = RecordParser(weighted, numeric)
+    async for text in aiter_text(stream, encoding):
+        await feed(parser, text, offload, executor)
+        for record in parser.drain():
+            yield record
+    parser.close()
+    for record in parser.drain():
+        yield record
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Whole-buffer parsing: finds every record boundary with a single regex scan
+over a :class:`bytes` object or a memory-mapped file.
+"""
+
+import mmap
+import os
+import re
+
+from . import Parser, make_parser, to_number
+
+__all__ = ['parse_buffer', 'parse_mapped']
+
+
+def join_lines(text):
+    r"""
+    Joins the physical lines of a multiline record exactly like
+    :meth:`Parser.ingest` does when given a file line-by-line.
+
+    >>> join_lines('var[] = multi\nline\n\n\nvalue')
+    'var[] = multi\n\nline\n\nvalue'
+    """
+    return '\n\n'.join(line for line in text.split('\n') if line)
+
+
+def first_line(buf):
+    r"""
+    Returns the first line of ``buf``, without its newline.
+
+    >>> first_line(b'counts[foo] = 1\ncounts[bar] = 2\n')
+    b'counts[foo] = 1'
+    """
+    newline = buf.find(b'\n')
+    return buf[:newline if newline >= 0 else len(buf)]
+
+
+def header_pattern(buf, encoding='utf-8'):
+    r"""
+    Returns a :class:`bytes` regex that matches the start of every record in
+    ``buf``, deduced from its first line.
+
+    >>> header_pattern(b'counts[foo] = 1\n').pattern
+    b'^counts\\['
+    """
+    keys_string, _ = Parser.cleave(first_line(buf).decode(encoding))
+    varname, _ = Parser.parse_keys(keys_string)
+    return re.compile(b'^' + re.escape(varname.encode(encoding)) + b'\\[',
+                      re.MULTILINE)
+
+
+def iter_raw_records(buf, pattern, start=0, end=None):
+    r"""
+    Slices ``buf`` (or the range from ``start`` to ``end``, which must
+    begin at a record) at every match of ``pattern``, yielding the raw bytes
+    of each record (trailing newlines included).
+
+    >>> buf = b'v[] = a\nb\nv[] = c\n'
+    >>> list(iter_raw_records(buf, header_pattern(buf)))
+    [b'v[] = a\nb\n', b'v[] = c\n']
+    """
+    if end is None:
+        end = len(buf)
+    # Skip ahead one byte: a record always begins at the start of the range.
+    for match in pattern.finditer(buf, start + 1, end):
+        boundary = match.start()
+        yield buf[start:boundary]
+        start = boundary
+    yield buf[start:end]
+
+
+def parse_buffer(buf, weighted=False, encoding='utf-8', numeric=False,
+                 compact=False, select=None):
+    r"""
+    Parses Boa output held entirely in ``buf`` (:class:`bytes` or an
+    :class:`mmap.mmap`). Returns the same results as :func:`bop.parse`.
+
+    >>> parse_buffer(b'counts[a] = 1\ncounts[b] = 2\n')
+    {'a': '1', 'b': '2'}
+    >>> parse_buffer(b'var[] = multi\nline\nvar[] = single\n')
+    ['multi\n\nline', 'single']
+    """
+    parser = make_parser(weighted, numeric, compact, select=select)
+    if len(buf) == 0:
+        return parser.result
+
+    parser.detect_format(first_line(buf).decode(encoding))
+    ingest_buffer(parser, buf, header_pattern(buf, encoding), encoding)
+    return parser.result
+
+
+def ingest_buffer(parser, buf, pattern, encoding='utf-8', start=0, end=None):
+    """
+    Adds every record in the given range of ``buf`` to ``parser``, whose
+    format must already be detected.
+    """
+    # Hoist everything out of the loop; this is the hot path.
+    weighted = parser.weighted
+    numeric = parser.numeric
+    intern_keys = parser.interned is not None
+    intern_prefix = parser.intern_prefix
+    cleave = parser.cleave
+    parse_weight = parser.parse_weight
+    split_keys = parser.split_keys
+    select = (parser.selector.match_bytes(encoding)
+              if parser.selector is not None else None)
+    if isinstance(parser._container, list):
+        append = (parser.append_value if numeric
+                  else parser._container.append)
+        add_result = None
+    else:
+        append = None
+        add_result = parser.add_result
+
+    for raw in iter_raw_records(buf, pattern, start, end):
+        if select is not None and not select(raw):
+            continue
+        line = raw.decode(encoding)
+        if '\r' in line:
+            line = line.replace('\r\n', '\n')
+        line = line.rstrip('\n')
+        if '\n' in line:
+            line = join_lines(line)
+
+        keys_string, value = cleave(line)
+        if append is not None:
+            append(to_number(value) if numeric else value)
+            continue
+
+        keys = split_keys(keys_string)
+        # Remove the "dummy" empty key for lists and weighted results.
+        if keys[-1] == '':
+            keys.pop()
+        if intern_keys:
+            intern_prefix(keys, len(keys) if weighted else -1)
+        if weighted:
+            keys.extend(parse_weight(value))
+        else:
+            keys.append(value)
+        if numeric:
+            keys[-1] = to_number(keys[-1])
+        add_result(*keys)
+
+    return parser
+
+
+def map_file(fileobj):
+    """
+    Returns a read-only :class:`mmap.mmap` of the entire file, or an empty
+    :class:`bytes` for empty files (which cannot be mapped).
+    """
+    fileno = fileobj.fileno()
+    if os.fstat(fileno).st_size == 0:
+        return b''
+    return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+
+def parse_mapped(fileobj, weighted=False, encoding=None, numeric=False,
+                 compact=False, select=None):
+    """
+    Memory-maps a seekable file object and parses it with
+    :func:`parse_buffer`. The whole file is parsed, regardless of the
+    current position of ``fileobj``.
+
+    If ``encoding`` is not given, the file object's own encoding is used,
+    falling back to UTF-8.
+    """
+    if encoding is None:
+        encoding = getattr(fileobj, 'encoding', None) or 'utf-8'
+
+    buf = map_file(fileobj)
+    try:
+        return parse_buffer(buf, weighted, encoding, numeric, compact,
+                            select)
+    finally:
+        if isinstance(buf, mmap.mmap):
+            buf.close()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+An on-disk cache of parsed results, so that the same output file is only
+ever parsed once.
+"""
+
+import errno
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+
+__all__ = ['ResultCache', 'default_cache_dir']
+
+# How much of the start and the end of a file goes into its cache key.
+SAMPLE_SIZE = 64 * 1024
+DEFAULT_MAX_SIZE = 4 * 1024 ** 3
+SUFFIX = '.pickle'
+
+replace = getattr(os, 'replace', os.rename)
+
+
+def default_cache_dir():
+    """
+    Returns ``$XDG_CACHE_HOME/bop`` (by default, ``~/.cache/bop``).
+    """
+    base = (os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'bop')
+
+
+class ResultCache(object):
+    """
+    Stores parsed results as pickles in ``directory``, keyed by the identity
+    of the parsed file and the options it was parsed with. Once the cache
+    grows beyond ``max_size`` bytes, the least recently used results are
+    evicted.
+
+    >>> import tempfile
+    >>> cache = ResultCache(tempfile.mkdtemp())
+    >>> cache.put('key', {'foo': '1'})
+    >>> cache.get('key')
+    {'foo': '1'}
+    >>> cache.get('missing') is None
+    True
+    """
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory or default_cache_dir()
+        self.max_size = max_size
+
+    def key(self, path, weighted=False, numeric=False, compact=False):
+        """
+        Returns the cache key for parsing ``path`` with the given options:
+        a hash of its canonical path, size, modification time, inode, and
+        its first and last few kilobytes.
+        """
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        digest = hashlib.sha1()
+        identity = (path, stat.st_size, stat.st_mtime, stat.st_ino,
+                    bool(weighted), bool(numeric), bool(compact))
+        digest.update(repr(identity).encode('UTF-8'))
+        with io.open(path, 'rb') as f:
+            digest.update(f.read(SAMPLE_SIZE))
+            if stat.st_size > SAMPLE_SIZE:
+                f.seek(max(SAMPLE_SIZE, stat.st_size - SAMPLE_SIZE))
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def filename(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key):
+        """
+        Returns the cached result, or ``None`` if it is not cached.
+        """
+        filename = self.filename(key)
+        try:
+            with io.open(filename, 'rb') as f:
+                result = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+        # Mark it as recently used.
+        os.utime(filename, None)
+        return result
+
+    def put(self, key, result):
+        """
+        Caches the result, evicting old results if the cache is too large.
+        """
+        try:
+            os.makedirs(self.directory)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+
+        # Write to a temporary file first, so that concurrent readers never
+        # see a partially written result.
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f, pickle.HIGHEST_PROTOCOL)
+            replace(temporary, self.filename(key))
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used results until the cache is no larger
+        than ``max_size``.
+        """
+        if self.max_size is None:
+            return
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            filename = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, filename))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, filename in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+            total -= size
+
+
+def parse_cached(path, cache, weighted=False, numeric=False, compact=False,
+                 **options):
+    """
+    Returns the result of :func:`bop.parse` for the file at ``path``, from
+    the cache if possible. ``cache`` is a :class:`ResultCache` or the name
+    of a directory.
+    """
+    from . import parse
+
+    if hasattr(path, 'read'):
+        path = path.name
+    if not isinstance(cache, ResultCache):
+        cache = ResultCache(cache)
+    key = cache.key(path, weighted, numeric, compact)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    options.update(weighted=weighted, numeric=numeric, compact=compact)
+    result = parse(path, **options)
+    cache.put(key, result)
+    return result
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Columnar results: one column per key depth, plus the values (or the
+identifiers and weights), built straight from the parsed records.
+"""
+
+from array import array
+from collections import OrderedDict
+
+from . import iter_records, append_compact
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ['parse_columns']
+
+# NumPy equivalents of the array typecodes used by append_compact().
+NUMPY_TYPES = {'l': 'i8', 'd': 'f8'}
+
+
+class ColumnBuilder(object):
+    """
+    Appends records to per-depth key columns and a value column. Records
+    with fewer keys than the deepest record are padded with ``None``.
+
+    >>> builder = ColumnBuilder()
+    >>> columns = builder.add((('a',), '1')).add((('a', 'b'), '2')).columns
+    >>> list(columns.items())
+    [('key0', ['a', 'a']), ('key1', [None, 'b']), ('value', ['1', '2'])]
+    """
+    def __init__(self, weighted=False, numeric=False):
+        self.weighted = weighted
+        self.numeric = numeric
+        self.keys = []
+        self.identifiers = []
+        self.values = []
+        self.length = 0
+
+    def add(self, record):
+        keys = record[0]
+        key_columns = self.keys
+        for depth, key in enumerate(keys):
+            if depth == len(key_columns):
+                key_columns.append([None] * self.length)
+            key_columns[depth].append(key)
+        for column in key_columns[len(keys):]:
+            column.append(None)
+
+        if self.weighted:
+            self.identifiers.append(record[1])
+        if self.numeric:
+            self.values = append_compact(self.values, record[-1])
+        else:
+            self.values.append(record[-1])
+        self.length += 1
+        return self
+
+    @property
+    def columns(self):
+        columns = OrderedDict(('key%d' % (depth,), column)
+                              for depth, column in enumerate(self.keys))
+        if self.weighted:
+            columns['identifier'] = self.identifiers
+            columns['weight'] = self.values
+        else:
+            columns['value'] = self.values
+        return columns
+
+
+def column_dtype(column):
+    """
+    Returns the NumPy dtype to store a column in.
+
+    >>> column_dtype(array('d', [0.5]))
+    'f8'
+    >>> column_dtype([1, 2]), column_dtype(['herp'])
+    ('i8', 'O')
+    """
+    if isinstance(column, array):
+        return NUMPY_TYPES.get(column.typecode, 'O')
+    if column and all(type(value) is int for value in column):
+        return 'i8'
+    if column and all(type(value) is float for value in column):
+        return 'f8'
+    return 'O'
+
+
+def to_structured_array(columns):
+    """
+    Converts a dictionary of equal-length columns to a NumPy structured
+    array.
+    """
+    length = len(next(iter(columns.values()))) if columns else 0
+    dtype = [(str(name), column_dtype(column))
+             for name, column in columns.items()]
+    result = numpy.empty(length, dtype=dtype)
+    for name, column in columns.items():
+        result[name] = column
+    return result
+
+
+def parse_columns(string_iter, weighted=False, numeric=False,
+                  use_numpy=None):
+    r"""
+    Parses Boa output into columns rather than a nested dictionary: the
+    keys at each depth go in columns named ``key0``, ``key1``, etc.; the
+    values go in a column named ``value`` (for weighted output, in the
+    columns ``identifier`` and ``weight``).
+
+    The columns are returned as a NumPy structured array if NumPy is
+    installed, or as an ordered dictionary of lists (or arrays, for
+    ``numeric`` values) otherwise. Pass ``use_numpy=False`` to always get a
+    dictionary.
+
+    >>> columns = parse_columns(['counts[a][x] = 1\n', 'counts[b][y] = 2\n'],
+    ...                         numeric=True, use_numpy=False)
+    >>> columns['key0'], columns['key1'], list(columns['value'])
+    (['a', 'b'], ['x', 'y'], [1, 2])
+
+    :param string_iter: A string or an iterator that yields strings, such as
+                        a :any:`file` object.
+    :param bool weighted: Whether the output consists of weights.
+    :param bool numeric: Whether to convert numeric values and weights.
+    :param bool use_numpy: Whether to return a NumPy structured array;
+                           by default, only if NumPy is installed.
+    """
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    elif use_numpy and numpy is None:
+        raise ImportError('NumPy is required for use_numpy=True')
+
+    builder = ColumnBuilder(weighted, numeric)
+    # Every row repeats its key prefix, so share the strings between rows.
+    for record in iter_records(string_iter, weighted, numeric,
+                               intern_keys=True):
+        builder.add(record)
+
+    if use_numpy:
+        return to_structured_array(builder.columns)
+    return builder.columns
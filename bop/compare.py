@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Compares two outputs of the same Boa job record by record. Both outputs are
+sorted by their keys with :func:`bop.sort.sort_records` (spilling to disk if
+need be) and then merged, so neither is ever held in memory as a whole.
+"""
+
+import json
+
+from . import iter_records, to_number
+from .sort import DEFAULT_MAX_MEMORY, parse_size, sort_records
+
+__all__ = ['diff', 'CHANGES']
+
+CHANGES = ('added', 'removed', 'changed')
+
+
+def keyed(records, weighted):
+    """
+    Yields ``(path, value, is_list)`` for each record. The path of a
+    weighted record ends with its identifier; the values of lists are their
+    own paths, so lists are compared as sets.
+    """
+    for record in records:
+        if weighted:
+            yield record[0] + (record[1],), record[2], False
+        elif record[0]:
+            yield record[0], record[1], False
+        else:
+            yield (record[1],), record[1], True
+
+
+def diff(old, new, weighted=False, numeric=False, summary=None,
+         max_memory=DEFAULT_MAX_MEMORY, tempdir=None, **options):
+    r"""
+    Yields the differences between two outputs, as ``(change, path,
+    old_value, new_value)`` tuples in order of their paths. ``change`` is
+    ``'added'``, ``'removed'`` or ``'changed'``; ``path`` is the tuple of
+    keys (followed by the identifier, when weighted); and the value missing
+    from either side is :data:`None`.
+
+    >>> old = ['counts[a] = 1\n', 'counts[b] = 2\n', 'counts[c] = 3\n']
+    >>> new = ['counts[d] = 4\n', 'counts[c] = 3\n', 'counts[a] = 5\n']
+    >>> for change in diff(old, new):
+    ...     print(change)
+    ('changed', ('a',), '1', '5')
+    ('removed', ('b',), '2', None)
+    ('added', ('d',), None, '4')
+
+    Outputs without keys (lists) are compared as sets of values, whose
+    paths are empty.
+
+    :param old: A path, or an iterator that yields strings (see
+                :func:`bop.parse`).
+    :param new: Likewise, for the output to compare with ``old``.
+    :param bool weighted: Whether the outputs consist of weights.
+    :param bool numeric: Whether to convert numeric values and weights
+                         before comparing them. Paths (including the values
+                         of lists) are always sorted as strings.
+    :param dict summary: If given, counts the changes under each top-level
+                         key (``''`` for lists), as a dict of
+                         :data:`CHANGES` to counts.
+    :param int max_memory: Roughly how many bytes of records to sort in
+                           memory, for each output.
+    :param str tempdir: Where to spill sorted records.
+    :param options: Other options for :func:`bop.iter_records` (e.g.,
+                    ``select``).
+    :return: an iterator of differences
+    """
+    def sorted_paths(string_iter):
+        # Numbers are only converted once matched: paths of mixed numbers
+        # and strings cannot be sorted.
+        records = iter_records(string_iter, weighted, False, **options)
+        return sort_records(keyed(records, weighted), False, max_memory,
+                            tempdir)
+
+    old_records = sorted_paths(old)
+    new_records = sorted_paths(new)
+    before = next(old_records, None)
+    after = next(new_records, None)
+
+    while before is not None or after is not None:
+        if after is None or (before is not None and before[0] < after[0]):
+            change, (path, value, is_list) = 'removed', before
+            values = value, None
+            before = next(old_records, None)
+        elif before is None or after[0] < before[0]:
+            change, (path, value, is_list) = 'added', after
+            values = None, value
+            after = next(new_records, None)
+        else:
+            change, path, is_list = 'changed', before[0], False
+            values = before[1], after[1]
+            before = next(old_records, None)
+            after = next(new_records, None)
+            if numeric:
+                values = to_number(values[0]), to_number(values[1])
+            if values[0] == values[1]:
+                continue
+
+        if numeric and change != 'changed':
+            values = tuple(value if value is None else to_number(value)
+                           for value in values)
+        if is_list:
+            path = ()
+        if summary is not None:
+            count_change(summary, path, change)
+        yield (change, path) + values
+
+
+def count_change(summary, path, change):
+    top = path[0] if path else ''
+    counts = summary.get(top)
+    if counts is None:
+        counts = summary[top] = dict((name, 0) for name in CHANGES)
+    counts[change] += 1
+
+
+def write_changes(changes, out):
+    r"""
+    Writes each difference as a JSON object on its own line.
+
+    >>> import sys
+    >>> write_changes([('changed', ('a',), '1', '5')], sys.stdout)
+    {"change": "changed", "keys": ["a"], "old": "1", "new": "5"}
+    """
+    dumps = json.dumps
+    for change, path, old, new in changes:
+        out.write('{"change": %s, "keys": %s, "old": %s, "new": %s}\n'
+                  % (dumps(change), dumps(list(path)), dumps(old),
+                     dumps(new)))
+
+
+def main(argv=None):
+    import sys
+    from argparse import ArgumentParser
+
+    arg_parser = ArgumentParser(prog='bop diff',
+                                description='Writes the differences between '
+                                            'two outputs as NDJSON, and a '
+                                            'summary of them to stderr. '
+                                            'Exits with 1 if they differ.')
+    arg_parser.add_argument('old', metavar='old.txt')
+    arg_parser.add_argument('new', metavar='new.txt')
+    arg_parser.add_argument('--weighted', action='store_true',
+                            help='the values are affixed with weights')
+    arg_parser.add_argument('--numeric', action='store_true',
+                            help='compare numeric values as numbers')
+    arg_parser.add_argument('--select', action='append', metavar='KEYS',
+                            help='only compare records under these keys '
+                                 '(repeatable)')
+    arg_parser.add_argument('--max-memory', default='256M', metavar='SIZE',
+                            help='how much memory to sort each output in '
+                                 '(default: %(default)s)')
+    args = arg_parser.parse_args(argv)
+    try:
+        max_memory = parse_size(args.max_memory)
+    except ValueError:
+        arg_parser.error('invalid --max-memory: %r' % (args.max_memory,))
+
+    summary = {}
+    write_changes(diff(args.old, args.new, args.weighted, args.numeric,
+                       summary, max_memory, select=args.select,
+                       binary=True), sys.stdout)
+    for top in sorted(summary):
+        counts = summary[top]
+        sys.stderr.write('%s: %d added, %d removed, %d changed\n'
+                         % (top or '[]', counts['added'], counts['removed'],
+                            counts['changed']))
+    return 1 if summary else 0
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Reads output files that may be compressed with gzip, bzip2, or xz. The
+compression is detected by the file's magic bytes, and decompression
+happens in a background thread while the main thread parses.
+"""
+
+import bz2
+import gzip
+import io
+
+from threading import Event, Thread
+
+try:
+    from queue import Queue, Empty, Full
+except ImportError:  # Python 2
+    from Queue import Queue, Empty, Full
+
+try:
+    import lzma
+except ImportError:  # Python 2
+    lzma = None
+
+__all__ = ['open_binary', 'iter_lines', 'iter_chunks', 'is_compressed']
+
+# Characters read (and decompressed) at once by the background thread.
+CHUNK_SIZE = 1024 * 1024
+# How many chunks the background thread may read ahead of the parser.
+READ_AHEAD = 4
+
+MAGIC = [
+    (b'\x1f\x8b', gzip.GzipFile),
+    (b'BZh', bz2.BZ2File),
+]
+if lzma is not None:
+    MAGIC.append((b'\xfd7zXZ\x00', lzma.LZMAFile))
+
+
+def decompressor_for(path):
+    """
+    Returns the file class that decompresses the file at ``path``, or
+    ``None`` if it is not compressed.
+    """
+    with io.open(path, 'rb') as f:
+        start = f.read(6)
+    for magic, file_class in MAGIC:
+        if start.startswith(magic):
+            return file_class
+    return None
+
+
+def is_compressed(path):
+    return decompressor_for(path) is not None
+
+
+def open_binary(path):
+    """
+    Opens the file at ``path`` for reading bytes, decompressing it if
+    necessary.
+    """
+    file_class = decompressor_for(path)
+    if file_class is None:
+        return io.open(path, 'rb')
+    return file_class(path, 'rb')
+
+
+class ReadAhead(object):
+    """
+    Iterates over the lines of a text file that is read, in large chunks,
+    by a background thread. Since decompression releases the GIL, it
+    overlaps with parsing in the main thread.
+
+    If ``lines`` is false, the chunks themselves are yielded instead, so
+    binary files can be read ahead too.
+    """
+    def __init__(self, fileobj, chunk_size=CHUNK_SIZE, depth=READ_AHEAD,
+                 lines=True):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.lines = lines
+        self.queue = Queue(depth)
+        self.stopped = Event()
+        self.thread = Thread(target=self.run, name='bop-read-ahead')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        try:
+            leftover = ''
+            while not self.stopped.is_set():
+                chunk = self.fileobj.read(self.chunk_size)
+                if not chunk:
+                    break
+                if not self.lines:
+                    self.put([chunk])
+                    continue
+                lines = (leftover + chunk).split('\n')
+                leftover = lines.pop()
+                self.put([line + '\n' for line in lines])
+            if leftover:
+                self.put([leftover])
+            self.put(None)
+        except Exception as error:
+            self.put(error)
+
+    def put(self, item):
+        # Give up if the consumer has gone away.
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except Full:
+                pass
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            elif isinstance(item, Exception):
+                raise item
+            for line in item:
+                yield line
+
+    def close(self):
+        self.stopped.set()
+        # Unblock the background thread, if it is waiting.
+        try:
+            while True:
+                self.queue.get_nowait()
+        except Empty:
+            pass
+        self.thread.join()
+        self.fileobj.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_lines(path, encoding='UTF-8'):
+    """
+    Yields every line of the (possibly compressed) file at ``path``, just
+    like iterating over a file opened in text mode.
+    """
+    file_class = decompressor_for(path)
+    if file_class is None:
+        with io.open(path, encoding=encoding) as f:
+            for line in f:
+                yield line
+        return
+
+    textfile = io.TextIOWrapper(file_class(path, 'rb'), encoding=encoding)
+    with ReadAhead(textfile) as lines:
+        for line in lines:
+            yield line
+
+
+def iter_chunks(path, chunk_size=CHUNK_SIZE):
+    """
+    Yields the (decompressed) bytes of the file at ``path`` in chunks that
+    may begin and end anywhere. Like :func:`iter_lines`, compressed files
+    are decompressed in a background thread.
+    """
+    file_class = decompressor_for(path)
+    if file_class is None:
+        with io.open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    with ReadAhead(file_class(path, 'rb'), chunk_size,
+                   lines=False) as chunks:
+        for chunk in chunks:
+            yield chunk
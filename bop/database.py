@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Streams records into an SQLite database, for results that are too large
+to hold in memory. Each record becomes a row with one column per key depth
+(``key0``, ``key1``, ...) followed by ``value`` (or ``identifier`` and
+``weight``), just like :func:`bop.columns.parse_columns`.
+"""
+
+import sqlite3
+
+from itertools import islice
+
+from . import iter_records
+
+__all__ = ['to_sqlite']
+
+BATCH_SIZE = 10000
+
+
+def quote(name):
+    return '"%s"' % (name.replace('"', '""'),)
+
+
+class TableWriter(object):
+    """
+    Inserts records into a new table, whose key columns come first. The
+    table is created with the first batch of records, and rebuilt with more
+    key columns should deeper records be found later.
+    """
+    def __init__(self, connection, table, weighted=False):
+        self.connection = connection
+        self.name = table
+        self.table = quote(table)
+        self.weighted = weighted
+        # The number of key columns; None until the table is created.
+        self.depth = None
+        self.value_columns = (['identifier', 'weight'] if weighted
+                              else ['value'])
+        connection.execute('DROP TABLE IF EXISTS %s' % (self.table,))
+
+    @property
+    def key_columns(self):
+        return ['key%d' % (depth,) for depth in range(self.depth or 0)]
+
+    @property
+    def columns(self):
+        return self.key_columns + self.value_columns
+
+    def deepen(self, depth):
+        """
+        Creates the table with ``depth`` key columns, or rebuilds it with
+        them, copying the rows inserted so far.
+        """
+        execute = self.connection.execute
+        rebuild = self.depth is not None
+        old_columns = ', '.join(map(quote, self.columns))
+        old_table = quote(self.name + '_shallow')
+        if rebuild:
+            execute('ALTER TABLE %s RENAME TO %s' % (self.table, old_table))
+        self.depth = depth
+        execute('CREATE TABLE %s (%s)' % (
+            self.table, ', '.join(map(quote, self.columns))))
+        if rebuild:
+            execute('INSERT INTO %s (%s) SELECT %s FROM %s' % (
+                self.table, old_columns, old_columns, old_table))
+            execute('DROP TABLE %s' % (old_table,))
+
+    def insert(self, records):
+        """
+        Inserts a batch of records.
+        """
+        depth = max(len(record[0]) for record in records)
+        if self.depth is None or depth > self.depth:
+            self.deepen(depth)
+        columns = self.columns
+        statement = 'INSERT INTO %s (%s) VALUES (%s)' % (
+            self.table, ', '.join(map(quote, columns)),
+            ', '.join('?' * len(columns)))
+        padding = (None,) * self.depth
+        self.connection.executemany(statement, (
+            (record[0] + padding)[:self.depth] + record[1:]
+            for record in records))
+
+    def create_index(self):
+        """
+        Indexes the key columns (after inserting everything, which is much
+        faster than updating the index with every insert).
+        """
+        if self.depth is None:
+            self.deepen(0)
+        if self.depth == 0:
+            return
+        name = quote(self.table.strip('"') + '_keys')
+        self.connection.execute('CREATE INDEX %s ON %s (%s)' % (
+            name, self.table, ', '.join(map(quote, self.key_columns))))
+
+
+def to_sqlite(string_iter, db_path, weighted=False, numeric=False,
+              table='records', select=None, batch_size=BATCH_SIZE):
+    r"""
+    Parses Boa output into the table ``table`` of the SQLite database at
+    ``db_path``, replacing the table if it already exists. Records are
+    inserted in batches, in a single transaction, without ever building
+    the whole result in memory. Returns the number of rows inserted.
+
+    >>> import sqlite3, tempfile
+    >>> db_path = tempfile.mktemp(suffix='.sqlite')
+    >>> to_sqlite(['counts[a][b] = 1\n', 'counts[c] = 2\n'], db_path)
+    2
+    >>> sqlite3.connect(db_path).execute(
+    ...     'SELECT key0, key1, value FROM records').fetchall()
+    [('a', 'b', '1'), ('c', None, '2')]
+
+    :param string_iter: A path, or an iterator that yields strings (see
+                        :func:`bop.parse`).
+    :param str db_path: The SQLite database to write to.
+    :param bool weighted: Whether the output consists of weights.
+    :param bool numeric: Whether to store numeric values and weights as
+                         numbers.
+    :param str table: The table to write to.
+    :param select: Which records to insert (see :func:`bop.parse`).
+    :param int batch_size: How many records to insert at once.
+    :return: the number of rows inserted
+    """
+    records = iter_records(string_iter, weighted, numeric, select=select)
+    connection = sqlite3.connect(db_path)
+    rows = 0
+    try:
+        # The database can simply be written again should anything fail.
+        connection.execute('PRAGMA synchronous = OFF')
+        with connection:
+            writer = TableWriter(connection, table, weighted)
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+                writer.insert(batch)
+                rows += len(batch)
+            writer.create_index()
+    finally:
+        connection.close()
+    return rows
+
+
+def main(argv=None):
+    from argparse import ArgumentParser
+
+    arg_parser = ArgumentParser(prog='bop sqlite',
+                                description='Writes Boa output into an '
+                                            'SQLite database.')
+    arg_parser.add_argument('filename', metavar='output.txt')
+    arg_parser.add_argument('database', metavar='output.sqlite')
+    arg_parser.add_argument('--weighted', action='store_true',
+                            help='the values are affixed with weights')
+    arg_parser.add_argument('--numeric', action='store_true',
+                            help='store numeric values as numbers')
+    arg_parser.add_argument('--table', default='records',
+                            help='the table to (re)create '
+                                 '(default: %(default)s)')
+    arg_parser.add_argument('--select', action='append', metavar='KEYS',
+                            help='only insert records under these keys '
+                                 '(repeatable)')
+    args = arg_parser.parse_args(argv)
+    to_sqlite(args.filename, args.database, args.weighted, args.numeric,
+              args.table, args.select)
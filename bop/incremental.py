@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Incremental parsing of output files that are still growing (e.g., while
+being downloaded): each call only parses the bytes appended since the
+previous call.
+"""
+
+import io
+import os
+
+from . import Parser, SEQUENCE_TYPES, WEIGHT_PATTERN
+
+__all__ = ['Checkpoint', 'parse_incremental']
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class Checkpoint(object):
+    """
+    Everything needed to resume parsing a file: the parser (its container
+    and detected format), the byte offset just past the last complete line
+    read, the lines of the record that was still pending at that point, and
+    how to undo adding that record to the results.
+
+    Checkpoints can be pickled to resume parsing in another process.
+    """
+    def __init__(self, parser, offset=0, buffer=None, committed=None):
+        self.parser = parser
+        self.offset = offset
+        self.buffer = buffer if buffer is not None else []
+        # For lists: how many values were added by complete records only.
+        self.committed = committed
+        # For dicts: the keys the pending record was added under, whether
+        # they held a value before, and that value. If the keys of a node
+        # created for the pending record are given instead, it is removed.
+        self.undo = None
+
+    def save(self, parser, offset):
+        """
+        Records the state of ``parser`` before its pending record is
+        (tentatively) finalized.
+        """
+        self.offset = offset
+        self.buffer = list(parser.buffer)
+        self.undo = None
+        if isinstance(parser._container, SEQUENCE_TYPES):
+            self.committed = len(parser._container)
+        return self
+
+    def add_pending(self):
+        """
+        Tentatively adds the pending record to the results, unless it cannot
+        be parsed yet (i.e., its weight has not been written).
+        """
+        parser = self.parser
+        buffer, parser.buffer = parser.buffer, []
+        if not buffer:
+            return
+        line = '\n'.join(buffer)
+        if parser.weighted:
+            _, value = parser.cleave(line)
+            if not WEIGHT_PATTERN.search(value):
+                return
+        record = parser.parse_record(line)
+        if not isinstance(parser._container, SEQUENCE_TYPES):
+            path = record[0] + record[1:-1]
+            node = parser._container
+            for depth, key in enumerate(path[:-1]):
+                if key not in node:
+                    self.undo = (path[:depth + 1], False, None)
+                    break
+                node = node[key]
+            else:
+                key = path[-1]
+                self.undo = (path, key in node, node.get(key))
+        parser.add_record(record)
+
+    def restore(self):
+        """
+        Returns the parser, undoing the tentatively finalized record.
+        """
+        parser = self.parser
+        parser.buffer = list(self.buffer)
+        # The pending record will be parsed again once it is complete.
+        if self.committed is not None:
+            del parser._container[self.committed:]
+        if self.undo is not None:
+            path, existed, previous = self.undo
+            node = parser._container
+            for key in path[:-1]:
+                node = node[key]
+            if existed:
+                node[path[-1]] = previous
+            else:
+                del node[path[-1]]
+            self.undo = None
+            parser.reset_cursor()
+        return parser
+
+
+def iter_complete_lines(f, encoding):
+    """
+    Yields ``(line, offset)`` for every newline-terminated line from the
+    current position of the binary file ``f``, where ``offset`` is the
+    position just past the line. A trailing partial line is not yielded.
+    """
+    offset = f.tell()
+    leftover = b''
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        lines = (leftover + chunk).split(b'\n')
+        leftover = lines.pop()
+        for line in lines:
+            offset += len(line) + 1
+            yield line.decode(encoding) + '\n', offset
+
+
+def parse_incremental(path, checkpoint=None, weighted=False, numeric=False,
+                      final=False, encoding='utf-8'):
+    r"""
+    Parses the file at ``path``, resuming from ``checkpoint`` if given.
+    Returns a tuple of the results so far and a new checkpoint, to be
+    passed to the next call.
+
+    A line is only parsed once it ends in a newline, since the rest may not
+    have been written yet; pass ``final=True`` once the file is complete to
+    parse a final line without a trailing newline.
+
+    Note that the results are shared with the checkpoint, and will change
+    when parsing is resumed.
+
+    :param str path: The file to parse.
+    :param Checkpoint checkpoint: Where the previous call left off.
+    :param bool weighted: Whether the output consists of weights (ignored
+                          when resuming).
+    :param bool numeric: Whether to convert numeric values and weights
+                         (ignored when resuming).
+    :param bool final: Whether the file is known to be complete.
+    :return: parsed Boa output so far, and a checkpoint
+    """
+    if checkpoint is not None and os.path.getsize(path) < checkpoint.offset:
+        # The file was truncated or replaced; start from scratch.
+        checkpoint = Checkpoint(Parser(checkpoint.parser.weighted,
+                                       checkpoint.parser.numeric))
+    elif checkpoint is None:
+        checkpoint = Checkpoint(Parser(weighted, numeric))
+
+    parser = checkpoint.restore()
+    offset = checkpoint.offset
+    with io.open(path, 'rb') as f:
+        f.seek(offset)
+        for line, offset in iter_complete_lines(f, encoding):
+            parser.ingest(line)
+        f.seek(offset)
+        tail = f.read() if final else b''
+
+    if tail:
+        parser.ingest(tail.decode(encoding))
+        offset += len(tail)
+    checkpoint.save(parser, offset)
+    checkpoint.add_pending()
+
+    if parser._container is None:
+        # Nothing complete has been written yet.
+        return None, checkpoint
+    return parser.result, checkpoint
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Random access to huge outputs: a single scan records where the records of
+each first-level key are, and each key's subtree is parsed only when it is
+looked up.
+"""
+
+import errno
+import io
+import json
+import mmap
+import os
+import re
+import tempfile
+
+from collections import OrderedDict
+
+from . import Parser, make_parser
+from .buffer import first_line, header_pattern, ingest_buffer, map_file
+from .trie import Mapping
+
+__all__ = ['open_indexed', 'IndexedResult', 'build_index']
+
+SUFFIX = '.bopindex'
+# Bump whenever the format of the index changes.
+VERSION = 1
+
+replace = getattr(os, 'replace', os.rename)
+
+
+def build_index(buf, encoding='utf-8'):
+    r"""
+    Scans ``buf`` once, returning an ordered mapping from each first-level
+    key to the ``[start, end]`` byte ranges of its records. Consecutive
+    records with the same first key share one range.
+
+    >>> buf = b'c[a][x] = 1\nc[b][x] = 2\nc[a][y] = 3\n'
+    >>> list(build_index(buf).items())
+    [('a', [[0, 12], [24, 36]]), ('b', [[12, 24]])]
+    """
+    index = OrderedDict()
+    if len(buf) == 0:
+        return index
+    pattern = re.compile(header_pattern(buf, encoding).pattern +
+                         b'([^\\]\\n]*)\\]', re.MULTILINE)
+    key = None
+    ranges = None
+    for match in pattern.finditer(buf):
+        start = match.start()
+        if match.group(1) != key:
+            if ranges is not None:
+                ranges[-1][1] = start
+            key = match.group(1)
+            ranges = index.setdefault(key.decode(encoding), [])
+            ranges.append([start, None])
+    if ranges is not None:
+        ranges[-1][1] = len(buf)
+    return index
+
+
+def has_keys(header):
+    """
+    Whether the records (like the given first line) have any keys.
+
+    >>> has_keys('counts[a] = 1'), has_keys('counts[] = 1')
+    (True, False)
+    """
+    keys_string, _ = Parser.cleave(header)
+    _, keys = Parser.parse_keys(keys_string)
+    return keys != ['']
+
+
+def load_index(index_path, stat):
+    """
+    Returns the header and index stored in ``index_path``, or ``None`` if
+    it is missing, unreadable, or out-of-date.
+    """
+    try:
+        with io.open(index_path, encoding='UTF-8') as f:
+            stored = json.load(f, object_pairs_hook=OrderedDict)
+    except (IOError, OSError, ValueError):
+        return None
+    if (stored.get('version') != VERSION or
+            stored.get('size') != stat.st_size or
+            stored.get('mtime') != stat.st_mtime):
+        return None
+    return stored['header'], stored['index']
+
+
+def save_index(index_path, stat, header, index):
+    """
+    Writes the index atomically. Failing to do so (e.g., in a read-only
+    directory) is not an error; the index is simply rebuilt next time.
+    """
+    stored = OrderedDict([
+        ('version', VERSION),
+        ('size', stat.st_size),
+        ('mtime', stat.st_mtime),
+        ('header', header),
+        ('index', index),
+    ])
+    directory = os.path.dirname(os.path.abspath(index_path))
+    try:
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    except (IOError, OSError):
+        return
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(stored, f)
+        replace(temporary, index_path)
+    except (IOError, OSError) as error:
+        if error.errno not in (errno.EACCES, errno.EROFS, errno.ENOSPC):
+            raise
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+class IndexedResult(Mapping):
+    """
+    A read-only mapping of the first-level keys of a memory-mapped output
+    to their (parsed on first access, then cached) subtrees. Should be
+    closed when no longer needed.
+    """
+    def __init__(self, buf, header, index, weighted=False, numeric=False,
+                 compact=False, encoding='utf-8'):
+        self.buf = buf
+        self.header = header
+        self.index = index
+        self.options = (weighted, numeric, compact)
+        self.encoding = encoding
+        self.cache = {}
+
+    def __getitem__(self, key):
+        try:
+            return self.cache[key]
+        except KeyError:
+            pass
+        ranges = self.index[key]
+        parser = make_parser(*self.options).detect_format(self.header)
+        pattern = header_pattern(self.buf, self.encoding)
+        for start, end in ranges:
+            ingest_buffer(parser, self.buf, pattern, self.encoding,
+                          start, end)
+        value = self.cache[key] = parser.result[key]
+        return value
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def close(self):
+        self.cache.clear()
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_indexed(path, weighted=False, numeric=False, compact=False,
+                 encoding='utf-8', index_path=None):
+    r"""
+    Memory-maps the output at ``path``, returning an :class:`IndexedResult`.
+    The index of first-level keys is stored next to the output (in
+    ``index_path``, by default the path with ``.bopindex`` appended), and
+    is rebuilt whenever the output changes.
+
+    The output must have at least one key (it cannot be a list, or weighted
+    output without keys).
+
+    :param str path: The (uncompressed) output file.
+    :param bool weighted: Whether the output consists of weights.
+    :param bool numeric: Whether to convert numeric values and weights.
+    :param bool compact: Whether to build compact nested results.
+    :param str encoding: The encoding of the file.
+    :param str index_path: Where to store the index.
+    :return: a lazily parsed result
+    :rtype: :class:`IndexedResult`
+    """
+    if index_path is None:
+        index_path = path + SUFFIX
+    with io.open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        buf = map_file(f)
+
+    try:
+        stored = load_index(index_path, stat)
+        if stored is not None:
+            header, index = stored
+        else:
+            header = first_line(buf).decode(encoding)
+            if header and not has_keys(header):
+                raise ValueError('Only outputs with keys can be indexed')
+            index = build_index(buf, encoding)
+            save_index(index_path, stat, header, index)
+    except Exception:
+        if isinstance(buf, mmap.mmap):
+            buf.close()
+        raise
+    return IndexedResult(buf, header, index, weighted, numeric, compact,
+                         encoding)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Writes records as JSON while they are being parsed, so that memory use is
+bounded by the largest record rather than the entire output.
+"""
+
+import json
+
+__all__ = ['write_ndjson', 'write_json_stream', 'UngroupedRecords']
+
+
+class UngroupedRecords(ValueError):
+    """
+    Raised when the records of an object reappear after the object was
+    closed; see :class:`JSONStreamWriter`.
+    """
+
+
+def write_ndjson(records, out, weighted=False):
+    r"""
+    Writes each record as a JSON object on its own line.
+
+    >>> import sys
+    >>> write_ndjson([(('a', 'b'), '1')], sys.stdout)
+    {"keys": ["a", "b"], "value": "1"}
+    >>> write_ndjson([((), 'MIT', '3')], sys.stdout, weighted=True)
+    {"keys": [], "identifier": "MIT", "weight": "3"}
+    """
+    dumps = json.dumps
+    for record in records:
+        if weighted:
+            keys, identifier, weight = record
+            out.write('{"keys": %s, "identifier": %s, "weight": %s}\n'
+                      % (dumps(list(keys)), dumps(identifier), dumps(weight)))
+        else:
+            keys, value = record
+            out.write('{"keys": %s, "value": %s}\n'
+                      % (dumps(list(keys)), dumps(value)))
+
+
+class JSONStreamWriter(object):
+    """
+    Incrementally writes records as one (possibly nested) JSON object or
+    array, formatted exactly like the ``bop`` command formats the result of
+    :func:`bop.parse`.
+
+    Nested objects are closed as soon as a record with a different key
+    prefix arrives, so records must be grouped by their keys (as Boa emits
+    them). Should a key prefix reappear later, :class:`UngroupedRecords` is
+    raised rather than writing a duplicate key; sort the records first
+    (see :func:`bop.sort.sort_records`).
+    """
+    def __init__(self, out, weighted=False, indent=4):
+        self.out = out
+        self.weighted = weighted
+        self.indent = ' ' * indent
+        # The keys of the objects currently open (excluding the outermost).
+        self.path = []
+        # Whether the outermost value is a list; None until the first record.
+        self.is_list = None
+        self.empty = True
+        # For the outermost object and each open object: the keys of the
+        # objects already closed within it. Forgotten as each one closes, so
+        # memory is bounded by the widest open object, not by the output.
+        self.closed = [set()]
+
+    def newline(self, depth):
+        return '\n' + self.indent * depth
+
+    def write_separator(self, depth):
+        if self.empty:
+            self.out.write(self.newline(depth))
+        else:
+            self.out.write(', ' + self.newline(depth))
+        self.empty = False
+
+    def write(self, record):
+        out = self.out
+        if self.is_list is None:
+            self.is_list = not self.weighted and len(record[0]) == 0
+            out.write('[' if self.is_list else '{')
+
+        if self.is_list:
+            self.write_separator(1)
+            out.write(json.dumps(record[-1]))
+            return self
+
+        keys = list(record[0])
+        if self.weighted:
+            keys.append(record[1])
+        parents, key = keys[:-1], keys[-1]
+
+        # Close the objects that this record is not part of...
+        common = 0
+        for opened, parent in zip(self.path, parents):
+            if opened != parent:
+                break
+            common += 1
+        while len(self.path) > common:
+            self.closed.pop()
+            self.closed[-1].add(self.path.pop())
+            out.write(self.newline(len(self.path) + 1) + '}')
+
+        # ...then open the ones it is.
+        for parent in parents[common:]:
+            if parent in self.closed[-1]:
+                prefix = self.path + [parent]
+                raise UngroupedRecords('Records under %s are not grouped '
+                                       'together (sort them with --sort)'
+                                       % (''.join('[%s]' % (key,)
+                                                  for key in prefix),))
+            self.write_separator(len(self.path) + 1)
+            out.write(json.dumps(parent) + ': {')
+            self.path.append(parent)
+            self.closed.append(set())
+            self.empty = True
+
+        self.write_separator(len(self.path) + 1)
+        out.write(json.dumps(key) + ': ' + json.dumps(record[-1]))
+        return self
+
+    def close(self):
+        if self.is_list is None:
+            self.out.write('{}')
+            return
+        while self.path:
+            self.path.pop()
+            self.out.write(self.newline(len(self.path) + 1) + '}')
+        self.out.write(self.newline(0) + (']' if self.is_list else '}'))
+
+
+def write_json_stream(records, out, weighted=False):
+    r"""
+    Writes all of the records with a :class:`JSONStreamWriter`.
+
+    >>> import sys
+    >>> write_json_stream([(('a', 'b'), '1'), (('a', 'c'), '2')],
+    ...                   sys.stdout)  # doctest: +NORMALIZE_WHITESPACE
+    {
+        "a": {
+            "b": "1",
+            "c": "2"
+        }
+    }
+    """
+    writer = JSONStreamWriter(out, weighted)
+    for record in records:
+        writer.write(record)
+    writer.close()
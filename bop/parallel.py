@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Parses one large file on several cores: the file is split into chunks at
+record boundaries, each chunk is parsed in its own process, and the partial
+results are merged in their original order. Several files (e.g., the
+outputs of sharded jobs) can be parsed and merged the same way.
+"""
+
+import io
+
+from array import array
+from multiprocessing import Pool, cpu_count
+
+from . import make_parser, to_number, SEQUENCE_TYPES, STRING_TYPES
+from .trie import Mapping
+from .buffer import first_line, header_pattern, ingest_buffer, map_file
+
+__all__ = ['parse_parallel', 'parse_many', 'MergeConflict']
+
+CONFLICT_POLICIES = ('error', 'last', 'sum', 'list')
+
+
+class MergeConflict(ValueError):
+    """
+    Raised when merging results that have different values for the same
+    keys.
+    """
+
+
+def find_boundaries(buf, pattern, parts):
+    r"""
+    Splits ``buf`` into (at most) ``parts`` ranges, each starting at a line
+    that begins a new record. Since any such line ends the previous record,
+    a range never starts inside a multiline value.
+
+    >>> buf = b'v[] = a\nb\nv[] = c\nv[] = d\n'
+    >>> find_boundaries(buf, header_pattern(buf), 3)
+    [(0, 10), (10, 18), (18, 26)]
+    """
+    size = len(buf)
+    starts = [0]
+    for i in range(1, parts):
+        target = max(size * i // parts, starts[-1] + 1)
+        if target >= size:
+            break
+        match = pattern.search(buf, target)
+        if match is None:
+            break
+        if match.start() > starts[-1]:
+            starts.append(match.start())
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def merge(base, other, on_conflict='last', path=()):
+    """
+    Merges the result of a later chunk into the result of an earlier chunk,
+    as if the records of both had been parsed in sequence. Lists are
+    concatenated; nested results are merged key by key, and values of the
+    same keys are combined according to ``on_conflict`` (see
+    :func:`resolve`).
+
+    >>> merge(['a'], ['b'])
+    ['a', 'b']
+    >>> merge(array('l', [1]), array('d', [1.5]))
+    [1, 1.5]
+    >>> merge({'x': {'y': '1'}, 'z': '2'}, {'x': {'w': '3'}, 'z': '4'})
+    {'x': {'y': '1', 'w': '3'}, 'z': '4'}
+    >>> merge({'z': '2'}, {'z': '4'}, on_conflict='sum')
+    {'z': 6}
+    """
+    if isinstance(base, array):
+        if isinstance(other, array) and other.typecode == base.typecode:
+            base.extend(other)
+            return base
+        # Compact arrays of different types (see append_compact()).
+        base = list(base)
+    if isinstance(base, list) != isinstance(other, SEQUENCE_TYPES):
+        raise MergeConflict('Cannot merge a list with nested results')
+    if isinstance(base, list):
+        base.extend(other)
+        return base
+
+    for key, value in other.items():
+        if key not in base:
+            base[key] = value
+            continue
+        existing = base[key]
+        if isinstance(existing, Mapping) and isinstance(value, Mapping):
+            merge(existing, value, on_conflict, path + (key,))
+        else:
+            base[key] = resolve(existing, value, on_conflict, path + (key,))
+    return base
+
+
+def resolve(existing, value, on_conflict, path=()):
+    """
+    Returns the value for keys (``path``) that have both an ``existing``
+    value and a new ``value``: ``'error'`` raises :class:`MergeConflict`
+    (unless the values are equal), ``'last'`` keeps the new value,
+    ``'sum'`` adds the (numeric) values, and ``'list'`` collects all of the
+    values in a list.
+
+    >>> resolve('1', '2', 'list'), resolve(['1', '2'], '3', 'list')
+    (['1', '2'], ['1', '2', '3'])
+    >>> resolve('1', '1', 'error')
+    '1'
+    >>> resolve('1', '2', 'error', ('a', 'b'))
+    ... # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+        ...
+    MergeConflict: Conflicting values for ['a', 'b']: '1' and '2'
+    """
+    if on_conflict == 'last':
+        return value
+    elif on_conflict == 'error':
+        if existing == value:
+            return value
+    elif on_conflict == 'list':
+        if isinstance(existing, list):
+            existing.append(value)
+            return existing
+        return [existing, value]
+    elif on_conflict == 'sum':
+        if isinstance(existing, STRING_TYPES):
+            existing = to_number(existing)
+        if isinstance(value, STRING_TYPES):
+            value = to_number(value)
+        if (isinstance(existing, (int, float)) and
+                isinstance(value, (int, float))):
+            return existing + value
+    raise MergeConflict('Conflicting values for %r: %r and %r'
+                        % (list(path), existing, value))
+
+
+def parse_chunk(args):
+    """
+    Parses the records between ``start`` and ``end`` of the file at
+    ``path``. Runs in a worker process.
+    """
+    (path, weighted, numeric, compact, select, encoding, header,
+     start, end) = args
+    parser = make_parser(weighted, numeric, compact, select=select)
+    parser.detect_format(header)
+    with io.open(path, 'rb') as f:
+        buf = map_file(f)
+        try:
+            pattern = header_pattern(buf, encoding)
+            ingest_buffer(parser, buf, pattern, encoding, start, end)
+        finally:
+            buf.close()
+    return parser.result
+
+
+def parse_parallel(path, weighted=False, workers=None, encoding=None,
+                   numeric=False, compact=False, select=None):
+    """
+    Parses the file at ``path`` (or the file underlying a file object)
+    using a pool of ``workers`` processes (by default, one per CPU). The
+    result is identical to that of :func:`bop.parse`.
+    """
+    if hasattr(path, 'read'):
+        if encoding is None:
+            encoding = getattr(path, 'encoding', None)
+        path = path.name
+    if encoding is None:
+        encoding = 'utf-8'
+
+    with io.open(path, 'rb') as f:
+        buf = map_file(f)
+        if len(buf) == 0:
+            return make_parser(weighted, numeric, compact).result
+        try:
+            header = first_line(buf).decode(encoding)
+            pattern = header_pattern(buf, encoding)
+            parts = workers if workers is not None else cpu_count()
+            boundaries = find_boundaries(buf, pattern, parts)
+        finally:
+            buf.close()
+
+    tasks = [(path, weighted, numeric, compact, select, encoding, header,
+              start, end)
+             for start, end in boundaries]
+    if len(tasks) == 1:
+        return parse_chunk(tasks[0])
+
+    pool = Pool(min(len(tasks), parts))
+    try:
+        # imap() yields the partial results in their original order.
+        results = pool.imap(parse_chunk, tasks)
+        merged = next(results)
+        for result in results:
+            merged = merge(merged, result)
+    except BaseException:
+        # Don't wait for the remaining chunks.
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+    return merged
+
+
+def parse_file(args):
+    """
+    Parses a whole file. Runs in a worker process.
+    """
+    from . import parse
+    path, options = args
+    return parse(path, **options)
+
+
+def parse_many(paths, weighted=False, workers=None, on_conflict='error',
+               numeric=False, compact=False, select=None, binary=False,
+               encoding='UTF-8', errors='strict'):
+    """
+    Parses several files (e.g., the outputs of sharded jobs) using a pool
+    of ``workers`` processes (by default, one per CPU), and merges their
+    results in the order of ``paths``. Lists are concatenated; nested
+    results are merged, and values found under the same keys in more than
+    one file are combined according to ``on_conflict``: ``'error'``,
+    ``'last'``, ``'sum'`` or ``'list'`` (see :func:`resolve`). Within each
+    file, the last value wins, as with :func:`bop.parse`.
+
+    :param paths: The files to parse (possibly compressed).
+    :param bool weighted: Whether the outputs consist of weights.
+    :param int workers: The number of processes to parse with.
+    :param str on_conflict: How to combine values of the same keys.
+    :param bool numeric: Whether to convert numeric values and weights.
+    :param bool compact: Whether to build compact nested results.
+    :param select: Which records to parse (see :func:`bop.parse`).
+    :param bool binary: Whether to parse bytes (see :func:`bop.parse`).
+    :param str encoding: The encoding of the bytes.
+    :param str errors: How to handle bytes that cannot be decoded.
+    :return: the merged results
+    """
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError('Unknown conflict policy: %r' % (on_conflict,))
+    options = dict(weighted=weighted, numeric=numeric, compact=compact,
+                   select=select, binary=binary, encoding=encoding,
+                   errors=errors)
+    tasks = [(path, options) for path in paths]
+    if not tasks:
+        raise ValueError('No files to parse')
+
+    parts = workers if workers is not None else cpu_count()
+    if parts == 1 or len(tasks) == 1:
+        return merge_all(map(parse_file, tasks), on_conflict)
+
+    pool = Pool(min(len(tasks), parts))
+    try:
+        # imap() yields the results in the order of the paths.
+        merged = merge_all(pool.imap(parse_file, tasks), on_conflict)
+    except BaseException:
+        # Don't wait for the remaining files.
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+    return merged
+
+
+def merge_all(results, on_conflict):
+    results = iter(results)
+    merged = next(results)
+    for result in results:
+        merged = merge(merged, result, on_conflict)
+    return merged
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Selects records by their keys, so that records outside of the subtrees of
+interest are discarded as soon as their header is found, before their keys
+and values are parsed.
+"""
+
+import re
+
+from . import STRING_TYPES
+
+__all__ = ['Selector']
+
+REGEX_TYPE = type(re.compile(''))
+
+
+def glob_to_regex(glob):
+    r"""
+    Translates a glob matching a single key into a regular expression:
+    ``*`` matches any characters, and ``?`` matches a single character.
+
+    >>> glob_to_regex('p*.java') == r'p[^\]]*\.java'
+    True
+    """
+    parts = []
+    for char in glob:
+        if char == '*':
+            parts.append(r'[^\]]*')
+        elif char == '?':
+            parts.append(r'[^\]]')
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts)
+
+
+def path_to_regex(path):
+    r"""
+    Translates a key path prefix into a regular expression that matches the
+    bracketed keys of a header. ``path`` is a sequence of globs, a string of
+    bracketed globs (just like in Boa output), or a single glob.
+
+    >>> path_to_regex(['a', 'b*']) == path_to_regex('[a][b*]')
+    True
+    >>> path_to_regex('a') == r'\[a\]'
+    True
+    """
+    if isinstance(path, STRING_TYPES):
+        if path.startswith('[') and path.endswith(']'):
+            path = path[1:-1].split('][')
+        else:
+            path = [path]
+    return ''.join(r'\[%s\]' % glob_to_regex(key) for key in path)
+
+
+class Selector(object):
+    r"""
+    Matches header lines whose keys start with any of the given key path
+    prefixes (see :func:`path_to_regex`), or match any of the given
+    compiled regular expressions. Regular expressions are matched against
+    the header starting from the first ``[``.
+
+    >>> selector = Selector(['[projects/p1]', ('projects/p2', '*.java')])
+    >>> bool(selector.match('Varargs[projects/p1][A.java][1] = 1'))
+    True
+    >>> bool(selector.match('Varargs[projects/p2][A.c][1] = 1'))
+    False
+    >>> bool(Selector(re.compile(r'\[p\d\]')).match('counts[p1] = 1'))
+    True
+    """
+    def __init__(self, select):
+        if isinstance(select, Selector):
+            select = select.selectors
+        elif isinstance(select, STRING_TYPES + (REGEX_TYPE, tuple)):
+            select = [select]
+        self.selectors = list(select)
+
+        sources = []
+        flags = 0
+        for selector in self.selectors:
+            if isinstance(selector, REGEX_TYPE):
+                sources.append(selector.pattern)
+                flags |= selector.flags
+            else:
+                sources.append(path_to_regex(selector))
+        # Skip the name of the output variable.
+        self.source = r'[^\[]*(?:%s)' % ('|'.join(sources),)
+        self.flags = flags
+        self.match = re.compile(self.source, flags).match
+        self.byte_patterns = {}
+
+    def match_bytes(self, encoding):
+        """
+        Returns a function that matches encoded header lines.
+        """
+        pattern = self.byte_patterns.get(encoding)
+        if pattern is None:
+            pattern = re.compile(self.source.encode(encoding),
+                                 self.flags & ~re.UNICODE)
+            self.byte_patterns[encoding] = pattern
+        return pattern.match
+
+    def __getstate__(self):
+        # Compiled patterns cannot always be pickled; recompile them.
+        return self.selectors
+
+    def __setstate__(self, selectors):
+        self.__init__(selectors)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Sorts records by their keys using bounded memory: records are buffered up
+to a memory budget, spilled to temporary files as sorted runs, and the runs
+are merged. Sorted records can be written as NDJSON or as nested JSON (see
+:mod:`bop.output`), for deterministic output of any size.
+"""
+
+import heapq
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+
+from itertools import count
+
+from . import iter_records
+
+__all__ = ['sorted_records', 'sort_records', 'parse_size']
+
+DEFAULT_MAX_MEMORY = 256 * 1024 ** 2
+# Rough per-record overhead of the tuples holding it.
+RECORD_OVERHEAD = 200
+# The most runs merged at once, each of which holds a file open.
+MERGE_WIDTH = 64
+UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(text):
+    """
+    Parses a size such as ``512``, ``64M`` or ``1G`` into bytes.
+
+    >>> parse_size('64M'), parse_size('1.5k')
+    (67108864, 1536)
+    """
+    text = text.strip().upper()
+    if text and text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def record_size(record):
+    """
+    Estimates the memory used by a record, in bytes.
+    """
+    getsizeof = sys.getsizeof
+    return (RECORD_OVERHEAD + sum(getsizeof(key) for key in record[0]) +
+            sum(getsizeof(value) for value in record[1:]))
+
+
+def write_run(entries, directory):
+    """
+    Writes the (sorted) entries to a new file in ``directory``, returning
+    its name.
+    """
+    fd, filename = tempfile.mkstemp(dir=directory, suffix='.run')
+    # Each entry is pickled on its own, so that neither side's memo keeps
+    # every entry of the run alive.
+    with os.fdopen(fd, 'wb') as f:
+        for entry in entries:
+            pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+    return filename
+
+
+def read_run(filename):
+    with open(filename, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def merge_runs(runs, directory):
+    """
+    Merges the runs in batches of at most :data:`MERGE_WIDTH`, pass after
+    pass, until they can all be merged at once (alongside the entries still
+    in memory). Returns the remaining runs.
+    """
+    while len(runs) >= MERGE_WIDTH:
+        merged = []
+        for start in range(0, len(runs), MERGE_WIDTH):
+            batch = runs[start:start + MERGE_WIDTH]
+            entries = heapq.merge(*[read_run(run) for run in batch])
+            merged.append(write_run(entries, directory))
+            for run in batch:
+                os.remove(run)
+        runs = merged
+    return runs
+
+
+def sorted_records(string_iter, weighted=False, numeric=False,
+                   max_memory=DEFAULT_MAX_MEMORY, tempdir=None, **options):
+    r"""
+    Like :func:`bop.iter_records`, but yields the records sorted by their
+    keys (and then, when weighted, by their identifiers). As with
+    :func:`bop.parse`, only the last of several records with the same keys
+    is kept. Outputs without keys (lists) keep their order.
+
+    >>> list(sorted_records(['counts[b] = 1\n', 'counts[a] = 2\n',
+    ...                      'counts[b] = 3\n']))
+    [(('a',), '2'), (('b',), '3')]
+
+    :param string_iter: A path, or an iterator that yields strings (see
+                        :func:`bop.parse`).
+    :param bool weighted: Whether the output consists of weights.
+    :param bool numeric: Whether to convert numeric values and weights.
+    :param int max_memory: Roughly how many bytes of records to buffer
+                           before spilling them to disk.
+    :param str tempdir: Where to write the sorted runs.
+    :param options: Other options for :func:`bop.iter_records` (e.g.,
+                    ``select``).
+    :return: an iterator of sorted records
+    """
+    records = iter_records(string_iter, weighted, numeric, **options)
+    return sort_records(records, weighted, max_memory, tempdir)
+
+
+def sort_records(records, weighted=False, max_memory=DEFAULT_MAX_MEMORY,
+                 tempdir=None):
+    """
+    Sorts an iterable of records (e.g., from several outputs) as described
+    in :func:`sorted_records`.
+
+    At most about ``max_memory`` bytes of records are held in memory; the
+    rest are sorted in runs, which are spilled to temporary files (in
+    ``tempdir``) and merged at the end. The temporary files are removed once
+    the iterator is exhausted or closed.
+    """
+    directory = tempfile.mkdtemp(prefix='bop-sort-', dir=tempdir)
+    try:
+        sequence = count()
+        runs = []
+        entries = []
+        used = 0
+        for record in records:
+            path = record[0] + record[1:2] if weighted else record[0]
+            # The sequence number keeps records with equal keys in order.
+            entries.append((path, next(sequence), record))
+            used += record_size(record)
+            if used >= max_memory:
+                entries.sort()
+                runs.append(write_run(entries, directory))
+                entries = []
+                used = 0
+        entries.sort()
+
+        runs = merge_runs(runs, directory)
+        merged = heapq.merge(entries, *[read_run(run) for run in runs])
+        previous = None
+        for path, _, record in merged:
+            if previous is not None and (path != previous[0] or not path):
+                yield previous[1]
+            previous = (path, record)
+        if previous is not None:
+            yield previous[1]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Opt-in instrumentation of the parser: counters, per-phase timings and
+progress reports. A parser without a :class:`ParseStats` attached runs
+exactly the same code as before, so there is no overhead when disabled.
+"""
+
+import time
+
+__all__ = ['ParseStats']
+
+timer = getattr(time, 'perf_counter', time.time)
+
+PHASES = ('io', 'buffering', 'keys', 'insert')
+
+
+def newline_of(text):
+    return b'\n' if isinstance(text, bytes) else u'\n'
+
+
+class ParseStats(object):
+    r"""
+    Counts what a parser does, and where it spends its time. Pass one to
+    :func:`bop.parse` or :func:`bop.iter_records` (``stats=``), or
+    :meth:`attach` it to a :class:`bop.Parser` directly.
+
+    If ``progress`` is given, it is called with this object every
+    ``every`` records.
+
+    >>> import bop
+    >>> stats = ParseStats()
+    >>> bop.parse(['counts[a][b] = 1\n', 'counts[c][d] = 2\n', '3\n'],
+    ...           stats=stats)
+    {'a': {'b': '1'}, 'c': {'d': '2\n\n3'}}
+    >>> stats.lines, stats.records, stats.continuations, stats.max_depth
+    (3, 2, 1, 2)
+
+    The time spent in each phase is in :attr:`timings`, in seconds:
+
+    ``io``
+        outside of the parser: reading (and decoding) the input, and, for
+        :func:`bop.iter_records`, whatever is done with each record.
+    ``buffering``
+        finding where records start, and joining multiline values.
+    ``keys``
+        splitting records into keys and values (see
+        :meth:`~bop.Parser.parse_record`).
+    ``insert``
+        adding records to the result (see :meth:`~bop.Parser.add_record`).
+    """
+    def __init__(self, progress=None, every=100000):
+        self.progress = progress
+        self.every = every
+        self.lines = 0
+        self.records = 0
+        # Lines after the first of multiline values (ignoring blank lines).
+        self.continuations = 0
+        # Characters of text; bytes, if the output is ASCII.
+        self.bytes = 0
+        self.max_depth = 0
+        self.timings = dict.fromkeys(PHASES, 0.0)
+        self.started = self.last = timer()
+        # Total time spent in the parser.
+        self.parsing = 0.0
+
+    @property
+    def elapsed(self):
+        """
+        Seconds from when parsing started until the parser was last used.
+        """
+        return self.last - self.started
+
+    def attach(self, parser):
+        """
+        Instruments ``parser`` by wrapping its methods (on this instance
+        only). Returns the parser.
+        """
+        self.started = self.last = timer()
+        guard = []
+
+        def entry_point(method, count):
+            # Times the outermost call only; ingest() calls finalize(), etc.
+            def wrapper(*args):
+                if guard:
+                    return method(*args)
+                guard.append(True)
+                if args:
+                    count(args[0])
+                start = timer()
+                try:
+                    return method(*args)
+                finally:
+                    self.last = timer()
+                    self.parsing += self.last - start
+                    guard.pop()
+            return wrapper
+
+        def phase(method, name, after=None):
+            timings = self.timings
+
+            def wrapper(arg):
+                start = timer()
+                result = method(arg)
+                timings[name] += timer() - start
+                if after is not None:
+                    after(arg, result)
+                return result
+            return wrapper
+
+        parser.ingest = entry_point(parser.ingest, self.count_text)
+        parser.feed = entry_point(parser.feed, self.count_text)
+        parser.feed_lines = entry_point(parser.feed_lines, self.count_lines)
+        # The unterminated last line was counted with the text it came in.
+        parser.close = entry_point(parser.close, None)
+        parser.finalize = entry_point(parser.finalize, None)
+        parser.parse_record = phase(parser.parse_record, 'keys',
+                                    self.count_record)
+        parser.add_record = phase(parser.add_record, 'insert')
+        return parser
+
+    def count_text(self, text):
+        self.lines += text.count(newline_of(text))
+        self.bytes += len(text)
+
+    def count_lines(self, lines):
+        self.lines += len(lines)
+        self.bytes += sum(len(line) for line in lines) + len(lines)
+
+    def count_record(self, raw_line, record):
+        self.records += 1
+        lines = sum(1 for line in raw_line.split(newline_of(raw_line))
+                    if line)
+        self.continuations += max(lines - 1, 0)
+        # The identifier of a weighted record is a key, too.
+        depth = len(record) - 1 + len(record[0]) - 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.progress is not None and self.records % self.every == 0:
+            self.progress(self)
+
+    def update_timings(self):
+        timings = self.timings
+        timings['io'] = max(self.elapsed - self.parsing, 0.0)
+        timings['buffering'] = max(
+            self.parsing - timings['keys'] - timings['insert'], 0.0)
+        return timings
+
+    def summary(self):
+        """
+        Returns a human-readable summary of the counters and timings.
+        """
+        timings = self.update_timings()
+        elapsed = self.elapsed or float('inf')
+        lines = [
+            '%d lines, %d records (%d continuation lines), max depth %d'
+            % (self.lines, self.records, self.continuations, self.max_depth),
+            '%.2f MB in %.2f s: %.0f lines/s, %.2f MB/s'
+            % (self.bytes / 1e6, self.elapsed, self.lines / elapsed,
+               self.bytes / 1e6 / elapsed),
+        ]
+        for name in PHASES:
+            lines.append('  %-10s %8.3f s' % (name, timings[name]))
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return ('<ParseStats: %d lines, %d records, %d bytes>'
+                % (self.lines, self.records, self.bytes))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import pytest
+
+from .. import parse
+from ..aggregate import AggregatingParser
+
+INPUT = """
+licenses[a] = MIT, 3
+licenses[a] = GPL, 1
+licenses[b] = MIT, 2
+licenses[a] = MIT, 4
+licenses[a] = BSD, 2
+""".lstrip()
+
+
+def test_reduce():
+    lines = INPUT.splitlines(True)
+    assert parse(lines, weighted=True) == {
+        'a': {'MIT': '4', 'GPL': '1', 'BSD': '2'}, 'b': {'MIT': '2'}}
+    assert parse(lines, weighted=True, reduce='sum') == {
+        'a': {'MIT': 7, 'GPL': 1, 'BSD': 2}, 'b': {'MIT': 2}}
+    assert parse(lines, weighted=True, reduce='max')['a']['MIT'] == 4
+    assert parse(lines, weighted=True, reduce='min')['a']['MIT'] == 3
+    assert parse(lines, weighted=True, reduce='count') == {
+        'a': {'MIT': 2, 'GPL': 1, 'BSD': 1}, 'b': {'MIT': 1}}
+
+
+def test_top_k():
+    lines = INPUT.splitlines(True)
+    result = parse(lines, weighted=True, top_k=3)
+    assert result == {'a': {'MIT': 4, 'BSD': 2, 'GPL': 1}, 'b': {'MIT': 2}}
+    assert list(result['a']) == ['MIT', 'BSD', 'GPL']
+
+    # Like plain parsing, the last weight of each identifier is ranked.
+    lines = ['licenses[] = MIT, 3\n', 'licenses[] = GPL, 1\n',
+             'licenses[] = MIT, 0\n']
+    result = parse(lines, weighted=True, top_k=2)
+    assert list(result.items()) == [('GPL', 1), ('MIT', 0)]
+
+    lines = INPUT.splitlines(True)
+    result = parse(lines, weighted=True, top_k=2, reduce='sum')
+    assert list(result['a'].items()) == [('MIT', 7), ('BSD', 2)]
+
+    result = parse(lines, weighted=True, top_k=1, reduce='count')
+    assert result == {'a': {'MIT': 2}, 'b': {'MIT': 1}}
+
+    result = parse(lines, weighted=True, top_k=1, compact=True)
+    assert result == {'a': {'MIT': 4}, 'b': {'MIT': 2}}
+
+
+def test_top_k_ties():
+    parser = AggregatingParser(top_k=3)
+    parser.parse('licenses[] = license%d, %d\n' % (i, i % 50)
+                 for i in range(1000))
+    # Earlier identifiers win ties.
+    assert parser.result == {'license49': 49, 'license99': 49,
+                             'license149': 49}
+
+
+def test_top_k_memory():
+    lines = ['licenses[%d] = license%d, %d\n' % (i % 2, i - offset, i)
+             for i in range(1000) for offset in (0, 4)]
+    parser = AggregatingParser(top_k=5)
+    for line in lines:
+        parser.parse([line])
+        # Only top_k identifiers are kept under each key.
+        assert all(len(heap) <= 5 for heap, _ in parser.heaps.values())
+    # Weights only grow, so the largest are also the last.
+    result = parser.result
+    assert result == parse(lines, weighted=True, top_k=5, reduce='max')
+    assert list(result['1']) == ['license995', 'license999', 'license993',
+                                 'license997', 'license991']
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        parse(INPUT.splitlines(True), reduce='sum')
+    with pytest.raises(ValueError):
+        parse(INPUT.splitlines(True), weighted=True, reduce='mean')
+    with pytest.raises(ValueError):
+        parse(['licenses[] = MIT, many\n'], weighted=True, reduce='sum')
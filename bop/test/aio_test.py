@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+from .. import parse, iter_records, parse_async, aiter_records
+from .parser_test import INPUT_WITH_MULTILINE_VALUES, yield_lines
+
+CONTENTS = INPUT_WITH_MULTILINE_VALUES + u'some_var[] = ŝtono\n'
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def stream_reader(data, size=3):
+    async def make_reader():
+        reader = asyncio.StreamReader()
+        # Split the data so that multibyte characters are split, too.
+        for start in range(0, len(data), size):
+            reader.feed_data(data[start:start + size])
+        reader.feed_eof()
+        return reader
+    return make_reader
+
+
+async def chunks(data, size=5):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def test_parse_async_stream_reader():
+    expected = parse(yield_lines(CONTENTS))
+
+    async def main(offload):
+        reader = await stream_reader(CONTENTS.encode('UTF-8'))()
+        return await parse_async(reader, offload=offload)
+
+    assert expected == run(main(False))
+    assert expected == run(main(True))
+
+
+def test_parse_async_iterators():
+    expected = parse(yield_lines(CONTENTS))
+    assert expected == run(parse_async(chunks(CONTENTS)))
+    assert expected == run(parse_async(chunks(CONTENTS.encode('UTF-8'))))
+
+
+def test_aiter_records():
+    async def main():
+        return [record async for record in aiter_records(chunks(CONTENTS))]
+
+    assert list(iter_records(yield_lines(CONTENTS))) == run(main())
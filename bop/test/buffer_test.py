@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .. import Parser, parse
+from .parser_test import (GNU_LINE, GNU_LINE_WITH_WEIGHT,
+                          LINE_WITH_NESTED_VALUE, LINE_WITH_SINGLE_LINE_VALUE,
+                          LINE_WITH_MULTILINE_VALUE,
+                          INPUT_WITH_MULTILINE_VALUES, parse_both)
+
+
+def test_mmap_engine_matches_lines_engine(tmpdir):
+    inputs = [
+        (GNU_LINE * 3, False),
+        (GNU_LINE_WITH_WEIGHT, True),
+        (LINE_WITH_NESTED_VALUE, False),
+        (LINE_WITH_MULTILINE_VALUE + LINE_WITH_SINGLE_LINE_VALUE, False),
+        (INPUT_WITH_MULTILINE_VALUES, False),
+        (INPUT_WITH_MULTILINE_VALUES.rstrip('\n'), False),
+        (u'licenses[] = Ŝŭpŝtŭpa Licenco\n', False),
+        # The last line of a multiline value lacks a newline.
+        (u'v[a] = p\nv[b] = q\nr\ns', False),
+    ]
+    for contents, weighted in inputs:
+        expected, actual = parse_both(tmpdir, contents, weighted,
+                                      engine='mmap')
+        assert expected == actual
+        path = str(tmpdir.join('output.txt'))
+        assert expected == parse(path, weighted, binary=True)
+        assert expected == Parser(weighted).feed(contents).close().result
+
+
+def test_mmap_engine_numeric(tmpdir):
+    inputs = [
+        ('counts[] = 1\ncounts[] = 2\n', False),
+        ('counts[] = 1\ncounts[] = two\n', False),
+        (GNU_LINE_WITH_WEIGHT, True),
+        (LINE_WITH_NESTED_VALUE, False),
+    ]
+    for contents, weighted in inputs:
+        expected, actual = parse_both(tmpdir, contents, weighted, True,
+                                      engine='mmap')
+        assert expected == actual
+
+
+def test_unknown_engine():
+    try:
+        parse([GNU_LINE], engine='herp')
+    except ValueError:
+        pass
+    else:
+        assert False, 'Expected ValueError'
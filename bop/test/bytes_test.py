@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import gzip
+import io
+
+import pytest
+
+from .. import Parser, parse, iter_records
+from ..stats import ParseStats
+from .parser_test import (GNU_LINE_WITH_WEIGHT, LINE_WITH_NESTED_VALUE,
+                          LINE_WITH_MULTILINE_VALUE,
+                          INPUT_WITH_MULTILINE_VALUES)
+
+INPUTS = [
+    (INPUT_WITH_MULTILINE_VALUES, False),
+    (LINE_WITH_NESTED_VALUE + LINE_WITH_MULTILINE_VALUE, False),
+    (GNU_LINE_WITH_WEIGHT * 2, True),
+    (u'commits[ŝ][1] = ĉu\nne\ncommits[ŝ][2] = jes', False),
+]
+
+
+@pytest.mark.parametrize('contents, weighted', INPUTS)
+def test_parse_bytes(contents, weighted):
+    expected = parse(io.StringIO(contents), weighted)
+    data = contents.encode('UTF-8')
+    assert parse(io.BytesIO(data), weighted, binary=True) == expected
+    # Chunks may even split multibyte characters.
+    chunks = [data[start:start + 3] for start in range(0, len(data), 3)]
+    assert parse(chunks, weighted, binary=True) == expected
+    assert (list(iter_records(chunks, weighted, binary=True)) ==
+            list(iter_records(io.StringIO(contents), weighted)))
+
+
+def test_parse_bytes_path(tmpdir):
+    path = str(tmpdir.join('output.txt.gz'))
+    with gzip.open(path, 'wb') as f:
+        f.write(INPUT_WITH_MULTILINE_VALUES.encode('UTF-8'))
+    assert (parse(path, binary=True) ==
+            parse(io.StringIO(INPUT_WITH_MULTILINE_VALUES)))
+
+
+def test_decode_errors():
+    data = b'commits[a] = caf\xc3\xa9 \xff\r\nmore\r\ncommits[\xfe] = ok\r\n'
+    with pytest.raises(UnicodeDecodeError):
+        parse(io.BytesIO(data), binary=True)
+    assert parse(io.BytesIO(data), binary=True, errors='replace') == {
+        u'a': u'caf\xe9 \ufffd\n\nmore', u'\ufffd': u'ok'}
+
+
+def test_skipped_records_are_not_decoded():
+    data = b'commits[a] = ok\ncommits[b] = \xff\nbad \xfe\ncommits[a2] = ok\n'
+    assert parse(io.BytesIO(data), binary=True, select='a*') == {
+        u'a': u'ok', u'a2': u'ok'}
+
+
+def test_bytes_stats():
+    stats = ParseStats()
+    data = INPUT_WITH_MULTILINE_VALUES.encode('UTF-8')
+    parse(io.BytesIO(data), binary=True, stats=stats)
+    assert (stats.lines, stats.records, stats.continuations) == (7, 3, 2)
+    assert stats.bytes == len(data)
+
+
+def test_bytes_parser_feed():
+    parser = Parser(encoding='latin-1')
+    parser.feed(b'counts[\xe9] = 1\ncou').feed(b'nts[b] = 2')
+    assert parser.close().result == {u'é': u'1', u'b': u'2'}
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+from .. import parse
+from ..cache import ResultCache
+from .parser_test import GNU_LINE_WITH_WEIGHT, INPUT_WITH_MULTILINE_VALUES
+
+
+def test_parse_cached(tmpdir):
+    path = tmpdir.join('output.txt')
+    path.write(INPUT_WITH_MULTILINE_VALUES)
+    cache_dir = str(tmpdir.join('cache'))
+
+    expected = parse(path.open())
+    assert expected == parse(str(path), cache_dir=cache_dir)
+    assert 1 == len(os.listdir(cache_dir))
+
+    # A second parse hits the cache.
+    cache = ResultCache(cache_dir)
+    key = cache.key(str(path))
+    cache.put(key, ['from the cache'])
+    assert ['from the cache'] == parse(str(path), cache_dir=cache_dir)
+
+    # Different options are cached separately.
+    parse(str(path), weighted=False, numeric=True, cache_dir=cache_dir)
+    assert 2 == len(os.listdir(cache_dir))
+
+    # Modifying the file invalidates the cache.
+    path.write(GNU_LINE_WITH_WEIGHT)
+    os.utime(str(path), (0, 0))
+    result = parse(str(path), weighted=True, cache_dir=cache_dir)
+    assert {'GNU General Public License version 2.0 (GPLv2)': '78'} == result
+
+
+def test_cache_eviction(tmpdir):
+    cache = ResultCache(str(tmpdir), max_size=None)
+    for i in range(4):
+        cache.put('key%d' % (i,), ['x' * 100])
+        os.utime(cache.filename('key%d' % (i,)), (i, i))
+    # Reading a result marks it as recently used.
+    assert cache.get('key0') is not None
+
+    size = os.path.getsize(cache.filename('key0'))
+    cache.max_size = 2 * size
+    cache.evict()
+    assert cache.get('key0') is not None
+    assert cache.get('key1') is None
+    assert cache.get('key2') is None
+    assert cache.get('key3') is not None
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from ..columns import parse_columns
+from .parser_test import (GNU_LINE_WITH_WEIGHT, LINE_WITH_NESTED_VALUE,
+                          INPUT_WITH_MULTILINE_VALUES, yield_lines)
+
+
+def test_parse_columns():
+    columns = parse_columns([LINE_WITH_NESTED_VALUE], use_numpy=False)
+    assert ['key0', 'key1', 'key2', 'value'] == list(columns.keys())
+    assert ['http://sourceforge.net/projects/baggielayout'] == columns['key0']
+    assert ['1161048214105000'] == columns['key2']
+    assert ['1'] == columns['value']
+
+    columns = parse_columns(yield_lines(INPUT_WITH_MULTILINE_VALUES),
+                            use_numpy=False)
+    expected = ['single line value', 'multi\n\nline\n\nvalue', 'last value']
+    assert {'value': expected} == columns
+
+
+def test_parse_columns_weighted():
+    columns = parse_columns([GNU_LINE_WITH_WEIGHT] * 2, weighted=True,
+                            numeric=True, use_numpy=False)
+    assert ['identifier', 'weight'] == list(columns.keys())
+    assert [78, 78] == list(columns['weight'])
+
+
+def test_parse_columns_numpy():
+    numpy = pytest.importorskip('numpy')
+    lines = ['counts[a][x] = 1\n', 'counts[b] = 2\n']
+    result = parse_columns(lines, numeric=True)
+    assert isinstance(result, numpy.ndarray)
+    assert ['a', 'b'] == list(result['key0'])
+    assert ['x', None] == list(result['key1'])
+    assert [1, 2] == list(result['value'])
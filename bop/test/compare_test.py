@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+
+from .. import diff
+from ..compare import write_changes
+from .parser_test import GNU_LINE_WITH_WEIGHT, INPUT_WITH_MULTILINE_VALUES
+
+OLD = """
+Commits[bop][sha1] = I herped
+Commits[bop][sha2] = I derped
+and then
+Commits[pip][sha3] = fixed
+Commits[tox][sha4] = same
+""".lstrip()
+NEW = """
+Commits[tox][sha4] = same
+Commits[bop][sha2] = I derped
+and then some
+Commits[bop][sha5] = new
+Commits[pip][sha3] = fixed
+""".lstrip()
+
+
+def test_diff(tmpdir):
+    summary = {}
+    changes = list(diff(OLD.splitlines(True), NEW.splitlines(True),
+                        summary=summary, max_memory=1,
+                        tempdir=str(tmpdir)))
+    assert [
+        ('removed', ('bop', 'sha1'), 'I herped', None),
+        ('changed', ('bop', 'sha2'), 'I derped\n\nand then',
+         'I derped\n\nand then some'),
+        ('added', ('bop', 'sha5'), None, 'new'),
+    ] == changes
+    assert {'bop': {'added': 1, 'removed': 1, 'changed': 1}} == summary
+    assert [] == list(diff(OLD.splitlines(True), OLD.splitlines(True)))
+    assert [] == tmpdir.listdir()
+
+
+def test_diff_weighted_and_lists():
+    old = [GNU_LINE_WITH_WEIGHT, 'counts[] = MIT, 3\n']
+    new = ['counts[] = MIT, 3.0\n', 'counts[] = BSD, 1\n']
+    summary = {}
+    changes = list(diff(old, new, weighted=True, numeric=True,
+                        summary=summary))
+    assert [
+        ('added', ('BSD',), None, 1),
+        ('removed', ('GNU General Public License version 2.0 (GPLv2)',),
+         78, None),
+    ] == changes
+    assert 2 == len(summary)
+
+    new = INPUT_WITH_MULTILINE_VALUES.replace('last', 'final')
+    summary = {}
+    changes = list(diff(INPUT_WITH_MULTILINE_VALUES.splitlines(True),
+                        new.splitlines(True), summary=summary))
+    assert [('added', (), None, 'final value'),
+            ('removed', (), 'last value', None)] == changes
+    assert {'': {'added': 1, 'removed': 1, 'changed': 0}} == summary
+
+
+def test_write_changes():
+    out = io.StringIO()
+    write_changes(diff(OLD.splitlines(True), NEW.splitlines(True)), out)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert {'change': 'added', 'keys': ['bop', 'sha5'], 'old': None,
+            'new': 'new'} == lines[-1]
+
+
+def test_diff_numeric_lists_of_mixed_values():
+    old = ['counts[] = 1\n', 'counts[] = herp\n', 'counts[] = 10\n']
+    new = ['counts[] = derp\n', 'counts[] = 1\n', 'counts[] = 10\n']
+    changes = list(diff(old, new, numeric=True))
+    assert [('added', (), None, 'derp'),
+            ('removed', (), 'herp', None)] == changes
+
+    old = ['counts[a] = 1\n', 'counts[b] = x\n']
+    new = ['counts[a] = 1.0\n', 'counts[b] = 2\n']
+    assert [('changed', ('b',), 'x', 2)] == list(diff(old, new,
+                                                    numeric=True))
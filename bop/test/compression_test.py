@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bz2
+import gzip
+import io
+
+import pytest
+
+from .. import parse, iter_records
+from ..compression import ReadAhead, iter_chunks, iter_lines
+from .parser_test import INPUT_WITH_MULTILINE_VALUES, yield_lines
+
+CONTENTS = INPUT_WITH_MULTILINE_VALUES * 5 + u'some_var[] = ŝtono'
+
+
+def compressors():
+    yield 'gz', gzip.compress if hasattr(gzip, 'compress') else None
+    yield 'bz2', bz2.compress
+    lzma = pytest.importorskip('lzma')
+    yield 'xz', lzma.compress
+
+
+def test_parse_compressed(tmpdir):
+    expected = parse(yield_lines(CONTENTS))
+    plain = tmpdir.join('output.txt')
+    plain.write_binary(CONTENTS.encode('UTF-8'))
+    assert expected == parse(str(plain))
+
+    for suffix, compress in compressors():
+        if compress is None:
+            continue
+        path = tmpdir.join('output.txt.' + suffix)
+        path.write_binary(compress(CONTENTS.encode('UTF-8')))
+        assert list(io.open(str(plain), encoding='UTF-8')) == \
+            list(iter_lines(str(path)))
+        assert expected == parse(str(path))
+        assert expected == parse(str(path), binary=True)
+        assert CONTENTS.encode('UTF-8') == b''.join(
+            iter_chunks(str(path), chunk_size=7))
+        assert expected == parse(str(path), engine='mmap', workers=2)
+        assert len(expected) == len(list(iter_records(str(path))))
+
+
+def test_read_ahead_small_chunks():
+    textfile = io.StringIO(CONTENTS)
+    with ReadAhead(textfile, chunk_size=5, depth=1) as lines:
+        assert list(io.StringIO(CONTENTS)) == list(lines)
+
+
+def test_read_ahead_chunks():
+    binary = io.BytesIO(CONTENTS.encode('UTF-8'))
+    with ReadAhead(binary, chunk_size=5, depth=1, lines=False) as chunks:
+        chunks = list(chunks)
+    assert CONTENTS.encode('UTF-8') == b''.join(chunks)
+    assert all(len(chunk) <= 5 for chunk in chunks)
+
+
+def test_read_ahead_closed_early():
+    textfile = io.StringIO(CONTENTS)
+    with ReadAhead(textfile, chunk_size=5, depth=1) as lines:
+        assert u'some_var[] = single line value\n' == next(iter(lines))
+    assert textfile.closed
+
+
+def test_read_ahead_error():
+    class Broken(io.StringIO):
+        def read(self, size=-1):
+            raise IOError('herp')
+
+    with ReadAhead(Broken()) as lines:
+        with pytest.raises(IOError):
+            list(lines)
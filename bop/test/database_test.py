@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import io
+import sqlite3
+
+from .. import iter_records
+from ..database import to_sqlite, main
+from .parser_test import INPUT_WITH_MULTILINE_VALUES, NESTED_INPUT
+
+
+def query(db_path, sql):
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute(sql).fetchall()
+    finally:
+        connection.close()
+
+
+def test_to_sqlite_nested(tmpdir):
+    db_path = str(tmpdir.join('output.sqlite'))
+    lines = NESTED_INPUT.splitlines(True)
+    assert to_sqlite(lines, db_path, numeric=True, batch_size=7) == 100
+    rows = query(db_path, 'SELECT key0, key1, key2, value FROM records')
+    assert rows == [keys + (value,) for keys, value
+                    in iter_records(lines, numeric=True)]
+    assert query(db_path, "SELECT SUM(value) FROM records "
+                          "WHERE key0 = 'project3'") == [(sum(range(30, 40)),)]
+    indexes = query(db_path, "SELECT name FROM sqlite_master "
+                             "WHERE type = 'index'")
+    assert indexes == [('records_keys',)]
+
+
+def test_to_sqlite_deepens_and_replaces(tmpdir):
+    db_path = str(tmpdir.join('output.sqlite'))
+    to_sqlite(INPUT_WITH_MULTILINE_VALUES.splitlines(True), db_path)
+    assert query(db_path, 'SELECT value FROM records') == [
+        ('single line value',), ('multi\n\nline\n\nvalue',),
+        ('last value',)]
+
+    lines = ['counts[a] = 1\n', 'counts[b][c] = 2\n']
+    to_sqlite(lines, db_path, batch_size=1)
+    assert query(db_path, 'SELECT * FROM records') == [
+        ('a', None, '1'), ('b', 'c', '2')]
+
+
+def test_to_sqlite_key_columns_come_first(tmpdir):
+    db_path = str(tmpdir.join('output.sqlite'))
+    for batch_size in (1, 100):
+        to_sqlite(NESTED_INPUT.splitlines(True), db_path,
+                  batch_size=batch_size)
+        connection = sqlite3.connect(db_path)
+        try:
+            cursor = connection.execute('SELECT * FROM records')
+            assert [column[0] for column in cursor.description] == [
+                'key0', 'key1', 'key2', 'value']
+            assert cursor.fetchall()[0] == ('project0', 'File0.java', '0',
+                                            '0')
+        finally:
+            connection.close()
+
+    to_sqlite(['licenses[] = MIT, 3\n'], db_path, weighted=True)
+    assert query(db_path, 'SELECT * FROM records') == [('MIT', '3')]
+    to_sqlite([], db_path)
+    assert query(db_path, 'SELECT * FROM records') == []
+
+
+def test_sqlite_command(tmpdir):
+    path = str(tmpdir.join('output.txt'))
+    db_path = str(tmpdir.join('output.sqlite'))
+    with io.open(path, 'w', encoding='UTF-8') as f:
+        f.write(u'licenses[] = MIT, 3\nlicenses[] = GPL, 1\n')
+    main([path, db_path, '--weighted', '--numeric', '--table', 'licenses'])
+    assert query(db_path, 'SELECT identifier, weight FROM licenses') == [
+        ('MIT', 3), ('GPL', 1)]
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import pickle
+
+from .. import parse
+from ..incremental import parse_incremental
+from .parser_test import INPUT_WITH_MULTILINE_VALUES, LINE_WITH_MULTILINE_VALUE
+
+
+def grow(path, contents, weighted=False, step=7):
+    """
+    Writes the contents a few bytes at a time, resuming parsing after each
+    write (via a pickled checkpoint). Returns the final result.
+    """
+    data = contents.encode('UTF-8')
+    checkpoint = None
+    with io.open(path, 'wb') as f:
+        for start in range(0, len(data), step):
+            f.write(data[start:start + step])
+            f.flush()
+            if checkpoint is not None:
+                checkpoint = pickle.loads(pickle.dumps(checkpoint))
+            result, checkpoint = parse_incremental(path, checkpoint, weighted)
+    return parse_incremental(path, checkpoint, final=True)
+
+
+def test_parse_incremental_lists(tmpdir):
+    path = str(tmpdir.join('output.txt'))
+    contents = INPUT_WITH_MULTILINE_VALUES * 3
+    result, checkpoint = grow(path, contents)
+    assert parse(io.StringIO(contents)) == result
+    assert len(contents.encode('UTF-8')) == checkpoint.offset
+
+
+def test_parse_incremental_nested(tmpdir):
+    path = str(tmpdir.join('output.txt'))
+    contents = LINE_WITH_MULTILINE_VALUE + u'Commits[ŝ][sha3] = last'
+    result, _ = grow(path, contents)
+    assert parse(io.StringIO(contents)) == result
+
+
+def test_parse_incremental_only_parses_new_bytes(tmpdir):
+    path = tmpdir.join('output.txt')
+    path.write('counts[] = a\ncounts[] = b\n')
+    result, checkpoint = parse_incremental(str(path))
+    assert ['a', 'b'] == result
+
+    path.write('counts[] = c\ncoun', mode='a')
+    result, checkpoint = parse_incremental(str(path), checkpoint)
+    assert ['a', 'b', 'c'] == result
+    assert len('counts[] = a\ncounts[] = b\ncounts[] = c\n') == \
+        checkpoint.offset
+
+    # Truncated files are parsed from the beginning.
+    path.write('counts[] = d\n')
+    result, checkpoint = parse_incremental(str(path), checkpoint)
+    assert ['d'] == result
+
+
+def test_parse_incremental_weighted_multiline(tmpdir):
+    path = tmpdir.join('output.txt')
+    path.write('licenses[x] = Foo\n')
+    # The weight has not been written yet.
+    result, checkpoint = parse_incremental(str(path), weighted=True)
+    assert {} == result
+
+    path.write('licenses[x] = Foo, Bar\n')
+    result, checkpoint = parse_incremental(str(path), weighted=True)
+    assert {'x': {'Foo': 'Bar'}} == result
+    path.write('Baz, 5\n', mode='a')
+    result, checkpoint = parse_incremental(str(path), checkpoint)
+    expected = parse(io.StringIO(u'licenses[x] = Foo, Bar\nBaz, 5\n'),
+                     weighted=True)
+    assert {'x': {'Baz': '5'}} == expected == result
+
+    contents = (u'licenses[a] = MIT, 3\nlicenses[b] = GNU\nGPL, 2\n'
+                u'licenses[a] = Apache, 1\nlicenses[a] = MIT\nX11, 4\n')
+    result, _ = grow(str(path), contents, weighted=True)
+    assert parse(io.StringIO(contents), weighted=True) == result
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import io
+import os
+
+import pytest
+
+from .. import parse, open_indexed
+from ..index import SUFFIX
+from .parser_test import (INPUT_WITH_MULTILINE_VALUES, nested_lines,
+                          write_output)
+
+# Projects are interleaved, so each has several ranges in the index.
+NESTED_INPUT = (''.join(nested_lines(projects=7)) +
+                'Varargs[project0][File.java][100] = multi\nline\n')
+
+
+def test_open_indexed(tmpdir):
+    path = write_output(tmpdir, NESTED_INPUT)
+    expected = parse(path, numeric=True)
+    with open_indexed(path, numeric=True) as result:
+        assert list(result) == ['project%d' % (i,) for i in range(7)]
+        assert 'project8' not in result
+        assert not result.cache
+        assert result['project3'] == expected['project3']
+        assert list(result.cache) == ['project3']
+        assert result['project3'] is result['project3']
+        assert dict(result) == expected
+    assert os.path.exists(path + SUFFIX)
+
+
+def test_index_is_reused_until_the_output_changes(tmpdir):
+    path = write_output(tmpdir, NESTED_INPUT)
+    open_indexed(path).close()
+    with io.open(path + SUFFIX, encoding='UTF-8') as f:
+        stored = f.read()
+    with open_indexed(path) as result:
+        assert result['project0'] == parse(path)['project0']
+    with io.open(path + SUFFIX, encoding='UTF-8') as f:
+        assert f.read() == stored
+
+    path = write_output(tmpdir, u'Varargs[other][File.java][1] = 1\n')
+    os.utime(path, (0, 0))
+    with open_indexed(path) as result:
+        assert dict(result) == {'other': {'File.java': {'1': '1'}}}
+
+
+def test_open_indexed_weighted(tmpdir):
+    path = write_output(tmpdir,
+                        u'licenses[a] = MIT, 3\nlicenses[b] = GPL, 1\n')
+    with open_indexed(path, weighted=True) as result:
+        assert result['b'] == {'GPL': '1'}
+
+
+def test_lists_cannot_be_indexed(tmpdir):
+    path = write_output(tmpdir, INPUT_WITH_MULTILINE_VALUES)
+    with pytest.raises(ValueError):
+        open_indexed(path)
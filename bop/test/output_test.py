@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+
+from .. import parse, iter_records
+from ..output import (write_ndjson, write_json_stream, JSONStreamWriter,
+                      UngroupedRecords)
+from ..sort import sort_records
+from .parser_test import (GNU_LINE_WITH_WEIGHT, LINE_WITH_NESTED_VALUE,
+                          LINE_WITH_MULTILINE_VALUE,
+                          LINE_WITH_SINGLE_LINE_VALUE,
+                          INPUT_WITH_MULTILINE_VALUES, nested_lines,
+                          yield_lines)
+
+INPUTS = [
+    (INPUT_WITH_MULTILINE_VALUES, False),
+    (LINE_WITH_NESTED_VALUE, False),
+    (LINE_WITH_MULTILINE_VALUE + LINE_WITH_SINGLE_LINE_VALUE, False),
+    (GNU_LINE_WITH_WEIGHT + 'counts[] = MIT, 3\n', True),
+    (''.join(nested_lines(20, per_project=6, per_file=2)), False),
+]
+
+
+def test_write_json_stream():
+    for contents, weighted in INPUTS:
+        expected = json.dumps(parse(yield_lines(contents), weighted),
+                              indent=4, separators=(', ', ': '))
+        out = io.StringIO()
+        records = iter_records(yield_lines(contents), weighted)
+        write_json_stream(records, out, weighted)
+        assert expected == out.getvalue()
+
+
+def test_write_ndjson():
+    out = io.StringIO()
+    write_ndjson(iter_records(yield_lines(LINE_WITH_MULTILINE_VALUE)), out)
+    lines = out.getvalue().splitlines()
+    assert 1 == len(lines)
+    assert {
+        'keys': ['eddieantonio/bop', 'sha2'],
+        'value': 'I herped\n\nI derped\n\nI conquered',
+    } == json.loads(lines[0])
+
+
+def test_write_json_stream_rejects_ungrouped_records():
+    contents = 'v[a][b] = 1\nv[c] = 2\nv[a][d] = 3\n'
+    out = io.StringIO()
+    try:
+        write_json_stream(iter_records(contents.splitlines(True)), out)
+    except UngroupedRecords as error:
+        assert '[a]' in str(error)
+    else:
+        assert False, 'expected UngroupedRecords'
+
+    # Sorted, the same records are written in full.
+    out = io.StringIO()
+    write_json_stream(sort_records(iter_records(contents.splitlines(True))),
+                      out)
+    assert parse(contents.splitlines(True)) == json.loads(out.getvalue())
+
+
+def test_json_stream_writer_forgets_closed_objects():
+    writer = JSONStreamWriter(io.StringIO())
+    for record in iter_records(nested_lines(1000, per_file=2,
+                                            per_project=100)):
+        writer.write(record)
+        # Only the children of the objects still open are remembered.
+        assert sum(len(keys) for keys in writer.closed) <= 60
+    writer.close()
+
+    contents = 'v[a][b][x] = 1\nv[a][c][y] = 2\nv[a][b][z] = 3\n'
+    writer = JSONStreamWriter(io.StringIO())
+    try:
+        for record in iter_records(contents.splitlines(True)):
+            writer.write(record)
+    except UngroupedRecords as error:
+        assert '[a][b]' in str(error)
+    else:
+        assert False, 'expected UngroupedRecords'
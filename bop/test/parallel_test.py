@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+
+import pytest
+
+from .. import parse, parse_many
+from ..parallel import MergeConflict
+from .parser_test import (INPUT_WITH_MULTILINE_VALUES,
+                          LINE_WITH_MULTILINE_VALUE, NESTED_INPUT, parse_both,
+                          write_output)
+
+
+def test_parallel_parse_lists(tmpdir):
+    contents = INPUT_WITH_MULTILINE_VALUES * 10
+    expected, actual = parse_both(tmpdir, contents, workers=4)
+    assert expected == actual
+
+
+def test_parallel_parse_nested(tmpdir):
+    expected, actual = parse_both(tmpdir, NESTED_INPUT, workers=4)
+    assert expected == actual
+    assert list(expected.keys()) == list(actual.keys())
+
+
+def test_parallel_parse_weighted(tmpdir):
+    contents = ''.join('counts[] = license %d, %d\n' % (i % 7, i)
+                       for i in range(50))
+    expected, actual = parse_both(tmpdir, contents, weighted=True,
+                                  workers=4)
+    assert expected == actual
+
+
+def test_parallel_parse_more_workers_than_records(tmpdir):
+    contents = 'counts[] = one\ncounts[] = two\n'
+    expected, actual = parse_both(tmpdir, contents, workers=16)
+    assert expected == actual
+
+
+def test_parallel_parse_numeric(tmpdir):
+    contents = ''.join('counts[] = %d\n' % (i,) for i in range(50))
+    expected, actual = parse_both(tmpdir, contents, numeric=True, workers=4)
+    assert expected == actual
+
+    contents += 'counts[] = 0.5\n'
+    expected, actual = parse_both(tmpdir, contents, numeric=True, workers=4)
+    assert list(expected) == list(actual)
+
+
+def write_shards(tmpdir, *contents):
+    return [write_output(tmpdir, text, 'shard%d.txt' % (number,))
+            for number, text in enumerate(contents)]
+
+
+def test_parse_many(tmpdir):
+    lines = NESTED_INPUT.splitlines(True)
+    shards = [u''.join(lines[start:start + 30]) for start in (0, 30, 60)]
+    paths = write_shards(tmpdir, *shards)
+    expected = parse(io.StringIO(u''.join(shards)))
+    assert parse_many(paths, workers=2) == expected
+
+    paths = write_shards(tmpdir, INPUT_WITH_MULTILINE_VALUES,
+                         INPUT_WITH_MULTILINE_VALUES)
+    assert parse_many(paths, workers=1) == parse(
+        io.StringIO(INPUT_WITH_MULTILINE_VALUES * 2))
+
+
+def test_parse_many_conflicts(tmpdir):
+    paths = write_shards(tmpdir, u'counts[a][b] = 1\ncounts[c] = 2\n',
+                         u'counts[a][b] = 3\ncounts[d] = 4\n',
+                         u'counts[a][b] = 5\n')
+    with pytest.raises(MergeConflict):
+        parse_many(paths, workers=2)
+    assert parse_many(paths, on_conflict='last') == {
+        'a': {'b': '5'}, 'c': '2', 'd': '4'}
+    assert parse_many(paths, on_conflict='sum')['a'] == {'b': 9}
+    assert parse_many(paths, on_conflict='list')['a'] == {
+        'b': ['1', '3', '5']}
+
+    # Equal values don't conflict.
+    paths = write_shards(tmpdir, LINE_WITH_MULTILINE_VALUE,
+                         LINE_WITH_MULTILINE_VALUE + u'Commits[a][b] = c\n')
+    assert parse_many(paths, workers=1) == parse(
+        io.StringIO(LINE_WITH_MULTILINE_VALUE + u'Commits[a][b] = c\n'))
+
+    paths = write_shards(tmpdir, u'counts[a] = 1\n', u'counts[] = 2\n')
+    with pytest.raises(MergeConflict):
+        parse_many(paths, on_conflict='last')
+    with pytest.raises(ValueError):
+        parse_many(paths, on_conflict='first')
@@ -15,7 +15,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .. import Parser, parse
+import io
+
+from array import array
+
+from .. import Parser, parse, iter_records, parse_multiple
 
 # Test inputs
 GNU_LINE = 'licenses[] = GNU General Public License version 2.0 (GPLv2)\n'
@@ -35,6 +39,14 @@ line
 value
 some_var[] = last value
 """.lstrip()
+INPUT_WITH_MULTIPLE_VARIABLES = """
+licenses[] = MIT, 3
+commits[eddieantonio/bop][sha1] = I herped
+counts[] = derp
+I derped
+licenses[] = Apache, 2
+counts[] = quux
+""".lstrip()
 
 
 def yield_lines(string):
@@ -42,6 +54,45 @@ def yield_lines(string):
         yield line + '\n'
 
 
+def nested_lines(count=100, per_project=10, per_file=3, projects=None):
+    """
+    Yields ``count`` lines like ``LINE_WITH_NESTED_VALUE``, grouped
+    ``per_project`` to a project and ``per_file`` to a file. If ``projects``
+    is given, the lines cycle through that many projects instead, so that
+    projects are not grouped together.
+    """
+    for i in range(count):
+        project = i % projects if projects else i // per_project
+        yield ('Varargs[project%d][File%d.java][%d] = %d\n'
+               % (project, i // per_file, i, i))
+
+
+NESTED_INPUT = ''.join(nested_lines())
+
+
+def write_output(tmpdir, contents, name='output.txt'):
+    """
+    Writes ``contents`` to a file in ``tmpdir``, returning its path.
+    """
+    path = str(tmpdir.join(name))
+    with io.open(path, 'w', encoding='UTF-8') as f:
+        f.write(contents)
+    return path
+
+
+def parse_both(tmpdir, contents, weighted=False, numeric=False, **options):
+    """
+    Writes ``contents`` to a file, and returns the results of parsing it
+    line by line, and of parsing it with the given ``options``.
+    """
+    path = write_output(tmpdir, contents)
+    with io.open(path, encoding='UTF-8') as f:
+        expected = parse(f, weighted, numeric=numeric)
+    with io.open(path, encoding='UTF-8') as f:
+        actual = parse(f, weighted, numeric=numeric, **options)
+    return expected, actual
+
+
 def test_add_result():
     # Adds a simple results.
     p = Parser()
@@ -121,3 +172,131 @@ def test_parse_with_multiline_values():
     actual = parse(yield_lines(INPUT_WITH_MULTILINE_VALUES))
     expected = ['single line value', 'multi\n\nline\n\nvalue', 'last value']
     assert expected == actual
+
+
+def test_iter_records():
+    actual = list(iter_records(yield_lines(INPUT_WITH_MULTILINE_VALUES)))
+    expected = [
+        ((), 'single line value'),
+        ((), 'multi\n\nline\n\nvalue'),
+        ((), 'last value'),
+    ]
+    assert expected == actual
+
+    actual = list(iter_records([GNU_LINE_WITH_WEIGHT], weighted=True))
+    expected = [((), 'GNU General Public License version 2.0 (GPLv2)', '78')]
+    assert expected == actual
+
+    actual = list(iter_records([LINE_WITH_NESTED_VALUE]))
+    expected = [((
+        'http://sourceforge.net/projects/baggielayout',
+        '/baggieLayout/trunk/src/org/peterMaloney/swing/baggieLayout/XmlTable.java',
+        '1161048214105000'
+    ), '1')]
+    assert expected == actual
+
+
+def test_iter_records_is_lazy():
+    consumed = []
+
+    def lines():
+        for line in yield_lines(INPUT_WITH_MULTILINE_VALUES):
+            consumed.append(line)
+            yield line
+
+    records = iter_records(lines())
+    assert ((), 'single line value') == next(records)
+    # The first record is only complete once the next one begins.
+    assert len(consumed) == 2
+
+
+def test_parse_multiple():
+    actual = parse_multiple(yield_lines(INPUT_WITH_MULTIPLE_VARIABLES),
+                            weighted={'licenses'})
+    expected = {
+        'licenses': {'MIT': '3', 'Apache': '2'},
+        'commits': {'eddieantonio/bop': {'sha1': 'I herped'}},
+        'counts': ['derp\n\nI derped', 'quux'],
+    }
+    assert expected == actual
+    assert ['licenses', 'commits', 'counts'] == list(actual.keys())
+
+
+def test_parse_multiple_path(tmpdir):
+    path = tmpdir.join('output.txt')
+    path.write(INPUT_WITH_MULTIPLE_VARIABLES)
+    assert parse_multiple(yield_lines(INPUT_WITH_MULTIPLE_VARIABLES)) == \
+        parse_multiple(str(path))
+
+
+def test_parse_numeric():
+    result = parse([GNU_LINE_WITH_WEIGHT], weighted=True, numeric=True)
+    assert {'GNU General Public License version 2.0 (GPLv2)': 78} == result
+
+    result = parse([LINE_WITH_NESTED_VALUE], numeric=True)
+    assert 1 == result['http://sourceforge.net/projects/baggielayout'][
+        '/baggieLayout/trunk/src/org/peterMaloney/swing/baggieLayout/XmlTable.java'
+    ]['1161048214105000']
+
+    result = parse(['counts[] = 1\n', 'counts[] = 2\n'], numeric=True)
+    assert isinstance(result, array)
+    assert [1, 2] == list(result)
+
+    result = parse(['counts[] = 0.5\n', 'counts[] = 2\n'], numeric=True)
+    assert isinstance(result, array)
+    assert [0.5, 2.0] == list(result)
+
+    # Non-numeric values fall back to a plain list.
+    result = parse(['counts[] = 1\n', 'counts[] = herp\n'], numeric=True)
+    assert [1, 'herp'] == result
+
+
+def test_parse_deeply_nested_keys():
+    depth = 5000
+    line = 'deep' + ''.join('[%d]' % (i,) for i in range(depth)) + ' = bottom\n'
+    result = parse([line])
+    for i in range(depth - 1):
+        result = result[str(i)]
+    assert {str(depth - 1): 'bottom'} == result
+
+
+def test_feed_at_any_boundary():
+    contents = (INPUT_WITH_MULTILINE_VALUES + LINE_WITH_NESTED_VALUE +
+                LINE_WITH_SINGLE_LINE_VALUE).rstrip('\n')
+    expected = parse(yield_lines(INPUT_WITH_MULTILINE_VALUES))
+    for size in range(1, 40):
+        parser = Parser()
+        for start in range(0, len(INPUT_WITH_MULTILINE_VALUES), size):
+            parser.feed(INPUT_WITH_MULTILINE_VALUES[start:start + size])
+        assert expected == parser.close().result
+
+    for boundary in range(len(contents)):
+        parser = Parser(weighted=False)
+        parser.feed(contents[:boundary]).feed(contents[boundary:])
+        assert parse(yield_lines(contents)) == parser.close().result
+
+
+def test_feed_weighted():
+    parser = Parser(weighted=True)
+    parser.feed(GNU_LINE_WITH_WEIGHT[:10]).feed(GNU_LINE_WITH_WEIGHT[10:])
+    expected = {'GNU General Public License version 2.0 (GPLv2)': '78'}
+    assert expected == parser.close().result
+
+
+def test_consecutive_records_share_a_cursor():
+    contents = ('counts[a][b][c] = 1\ncounts[a][b][d] = 2\n'
+                'counts[a][e][f] = 3\ncounts[a][b][g] = 4\n'
+                'counts[h] = 5\ncounts[a][b][i] = 6\n')
+    expected = {'a': {'b': {'c': '1', 'd': '2', 'g': '4', 'i': '6'},
+                      'e': {'f': '3'}},
+                'h': '5'}
+    assert parse(yield_lines(contents)) == expected
+    assert parse(yield_lines(contents), compact=True) == expected
+    assert parse(contents.encode('UTF-8').splitlines(True),
+                 binary=True) == expected
+
+    parser = Parser()
+    parser.parse(yield_lines(contents))
+    result = parser.result
+    assert parser.cursor_prefix == ['a', 'b']
+    assert parser.cursor_node is result['a']['b']
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import io
+import re
+
+import pytest
+
+from .. import Parser, parse, iter_records
+from ..selection import Selector
+
+INPUT = """
+Commits[eddieantonio/bop][sha1] = I herped
+
+I derped
+Commits[eddieantonio/boa][sha2] = single
+Commits[eddieantonio/bop][sha3] = multi
+line
+Commits[other/bop][sha4] = Commits[eddieantonio/bop][sha5] = no
+""".lstrip()
+
+EXPECTED = {
+    'eddieantonio/bop': {
+        'sha1': 'I herped\n\nI derped',
+        'sha3': 'multi\n\nline',
+    },
+}
+
+
+def test_select_lines():
+    lines = INPUT.splitlines(True)
+    assert parse(lines, select='[eddieantonio/bop]') == EXPECTED
+    assert sorted(parse(lines, select='eddieantonio/bo?')) == [
+        'eddieantonio/boa', 'eddieantonio/bop']
+    assert parse(lines, select=[('eddieantonio/bop', 'sha3'),
+                                '[*][sha1]']) == {
+        'eddieantonio/bop': EXPECTED['eddieantonio/bop'],
+    }
+    assert parse(lines, select=re.compile(r'\[[^\]]*/bop\]\[sha4')) == {
+        'other/bop': {'sha4': 'Commits[eddieantonio/bop][sha5] = no'},
+    }
+    assert parse(lines, select='nothing') == {}
+
+
+def test_select_records():
+    records = list(iter_records(INPUT.splitlines(True),
+                                select='[eddieantonio/bop][sha3]'))
+    assert records == [(('eddieantonio/bop', 'sha3'), 'multi\n\nline')]
+
+
+def test_select_feed():
+    parser = Parser()
+    parser.selector = Selector('[eddieantonio/bop]')
+    for start in range(0, len(INPUT), 7):
+        parser.feed(INPUT[start:start + 7])
+    assert parser.close().result == EXPECTED
+
+
+@pytest.mark.parametrize('options', [{'engine': 'mmap'}, {'workers': 3}])
+def test_select_engines(tmpdir, options):
+    path = str(tmpdir.join('output.txt'))
+    with io.open(path, 'w', encoding='UTF-8') as f:
+        f.write(INPUT * 5)
+    assert parse(path, select='[eddieantonio/bop]', **options) == EXPECTED
+
+
+def test_select_cannot_be_cached(tmpdir):
+    with pytest.raises(ValueError):
+        parse(INPUT.splitlines(True), select='a', cache_dir=str(tmpdir))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import random
+
+from .. import parse, iter_records
+from ..output import write_json_stream
+from ..sort import sorted_records, sort_records
+from .parser_test import (GNU_LINE_WITH_WEIGHT, LINE_WITH_MULTILINE_VALUE,
+                          INPUT_WITH_MULTILINE_VALUES, nested_lines,
+                          yield_lines)
+
+
+def shuffled_output(n=500):
+    lines = list(nested_lines(n, projects=7))
+    random.Random(42).shuffle(lines)
+    return ''.join(lines)
+
+
+def test_sorted_records_spill_to_disk(tmpdir):
+    contents = shuffled_output()
+    expected = sorted(iter_records(yield_lines(contents)))
+    # A tiny budget forces a run for almost every record.
+    actual = list(sorted_records(yield_lines(contents), max_memory=1000,
+                                 tempdir=str(tmpdir)))
+    assert expected == actual
+    assert list(sorted_records(yield_lines(contents))) == actual
+    # The runs are removed once the records are exhausted.
+    assert [] == tmpdir.listdir()
+
+
+def test_sorted_records_keep_the_last_duplicate(tmpdir):
+    contents = ('counts[b] = 1\ncounts[a][x] = 2\ncounts[b] = 3\n'
+                'counts[a][x] = 4\ncounts[a][w] = 5\n')
+    for max_memory in (1, 10 ** 6):
+        actual = list(sorted_records(contents.splitlines(True),
+                                     max_memory=max_memory,
+                                     tempdir=str(tmpdir)))
+        assert [(('a', 'w'), '5'), (('a', 'x'), '4'),
+                (('b',), '3')] == actual
+
+    weighted = GNU_LINE_WITH_WEIGHT + 'counts[] = MIT, 3\n'
+    actual = list(sorted_records(weighted.splitlines(True), weighted=True,
+                                 numeric=True, max_memory=1))
+    assert [((), 'GNU General Public License version 2.0 (GPLv2)', 78),
+            ((), 'MIT', 3)] == actual
+
+
+def test_sorted_records_with_multiline_values(tmpdir):
+    lines = yield_lines(INPUT_WITH_MULTILINE_VALUES)
+    # Lists keep their order.
+    actual = [value for _, value in sorted_records(lines, max_memory=1,
+                                                   tempdir=str(tmpdir))]
+    assert parse(yield_lines(INPUT_WITH_MULTILINE_VALUES)) == actual
+
+    contents = LINE_WITH_MULTILINE_VALUE + 'Commits[aaa][sha0] = x\ny\n'
+    actual = list(sorted_records(yield_lines(contents), max_memory=1,
+                                 tempdir=str(tmpdir)))
+    assert [(('aaa', 'sha0'), 'x\n\ny'),
+            (('eddieantonio/bop', 'sha2'),
+             'I herped\n\nI derped\n\nI conquered')] == actual
+
+
+def test_sorted_json_matches_parse():
+    contents = shuffled_output()
+    out = io.StringIO()
+    records = sorted_records(yield_lines(contents), max_memory=4096)
+    write_json_stream(records, out)
+    assert parse(yield_lines(contents)) == json.loads(out.getvalue())
+    # The output is deterministic: keys are sorted at every level.
+    expected = json.dumps(parse(yield_lines(contents)), indent=4,
+                          separators=(', ', ': '), sort_keys=True)
+    assert expected == out.getvalue()
+
+
+def test_sort_records_closes_early(tmpdir):
+    records = iter_records(yield_lines(shuffled_output()))
+    sorted_iter = sort_records(records, max_memory=1000, tempdir=str(tmpdir))
+    next(sorted_iter)
+    assert len(tmpdir.listdir()) == 1
+    sorted_iter.close()
+    assert [] == tmpdir.listdir()
+
+
+def test_sort_records_merges_in_passes(tmpdir, monkeypatch):
+    from .. import sort
+    open_runs = [0]
+    most = [0]
+    read_run = sort.read_run
+
+    def counting_read_run(filename):
+        open_runs[0] += 1
+        most[0] = max(most[0], open_runs[0])
+        try:
+            for entry in read_run(filename):
+                yield entry
+        finally:
+            open_runs[0] -= 1
+
+    monkeypatch.setattr(sort, 'read_run', counting_read_run)
+    monkeypatch.setattr(sort, 'MERGE_WIDTH', 4)
+    contents = shuffled_output(100)
+    actual = list(sorted_records(yield_lines(contents), max_memory=1,
+                                 tempdir=str(tmpdir)))
+    assert sorted(iter_records(yield_lines(contents))) == actual
+    assert most[0] <= 4
+    assert [] == tmpdir.listdir()
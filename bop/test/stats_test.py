@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import pytest
+
+from .. import Parser, parse, iter_records
+from ..stats import ParseStats
+from .parser_test import (GNU_LINE_WITH_WEIGHT, LINE_WITH_NESTED_VALUE,
+                          INPUT_WITH_MULTILINE_VALUES, yield_lines)
+
+
+def test_counters():
+    stats = ParseStats()
+    lines = INPUT_WITH_MULTILINE_VALUES.splitlines(True)
+    assert parse(lines) == parse(lines, stats=stats)
+    assert stats.lines == 7
+    assert stats.records == 3
+    assert stats.continuations == 2
+    assert stats.bytes == len(INPUT_WITH_MULTILINE_VALUES)
+    assert stats.max_depth == 0
+
+    stats = ParseStats()
+    list(iter_records([LINE_WITH_NESTED_VALUE], stats=stats))
+    assert (stats.lines, stats.records, stats.max_depth) == (1, 1, 3)
+
+    stats = ParseStats()
+    parse([GNU_LINE_WITH_WEIGHT], weighted=True, stats=stats)
+    assert stats.max_depth == 1
+
+
+def test_feed_counters():
+    stats = ParseStats()
+    parser = stats.attach(Parser())
+    parser.feed(INPUT_WITH_MULTILINE_VALUES[:30])
+    parser.feed(INPUT_WITH_MULTILINE_VALUES[30:]).close()
+    assert stats.lines == 7
+    assert stats.records == 3
+    assert stats.continuations == 2
+    assert stats.bytes == len(INPUT_WITH_MULTILINE_VALUES)
+
+
+def test_unterminated_last_line(tmpdir):
+    contents = INPUT_WITH_MULTILINE_VALUES.rstrip('\n')
+    path = tmpdir.join('output.txt')
+    path.write(contents)
+    for binary in (False, True):
+        stats = ParseStats()
+        parse(str(path), binary=binary, stats=stats)
+        # The last line is counted once, without a newline.
+        assert stats.bytes == len(contents)
+        assert stats.lines == 6
+        assert stats.records == 3
+
+    stats = ParseStats()
+    stats.attach(Parser()).feed(contents).close()
+    assert (stats.lines, stats.bytes) == (6, len(contents))
+
+
+def test_timings():
+    stats = ParseStats()
+    parse(yield_lines(INPUT_WITH_MULTILINE_VALUES * 100), stats=stats)
+    stats.update_timings()
+    assert all(seconds >= 0 for seconds in stats.timings.values())
+    assert sum(stats.timings.values()) == pytest.approx(stats.elapsed)
+    assert 'lines/s' in stats.summary()
+
+
+def test_progress():
+    reports = []
+    stats = ParseStats(progress=lambda s: reports.append(s.records), every=2)
+    parse(yield_lines(INPUT_WITH_MULTILINE_VALUES * 3), stats=stats)
+    assert reports == [2, 4, 6, 8]
+
+
+def test_disabled_by_default():
+    parser = Parser()
+    assert 'ingest' not in vars(parser)
+
+
+def test_other_engines_are_rejected(tmpdir):
+    path = tmpdir.join('output.txt')
+    path.write(INPUT_WITH_MULTILINE_VALUES)
+    with pytest.raises(ValueError):
+        parse(str(path), engine='mmap', stats=ParseStats())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- encoding: UTF-8 -*-
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .. import parse, iter_records
+from ..trie import CompactNode, MAX_TUPLE_CHILDREN
+from .parser_test import (GNU_LINE_WITH_WEIGHT, LINE_WITH_NESTED_VALUE,
+                          nested_lines)
+
+NESTED_INPUT = list(nested_lines(per_file=2, projects=3))
+
+
+def test_compact_node():
+    node = CompactNode()
+    for i in range(MAX_TUPLE_CHILDREN * 2):
+        node[str(i)] = i
+    node['0'] = 'replaced'
+    assert len(node) == MAX_TUPLE_CHILDREN * 2
+    assert 'replaced' == node['0']
+    assert str(MAX_TUPLE_CHILDREN * 2 - 1) in node
+    assert 'herp' not in node
+    assert [str(i) for i in range(MAX_TUPLE_CHILDREN * 2)] == list(node)
+
+
+def test_parse_compact():
+    for lines, weighted in [(NESTED_INPUT, False),
+                            ([LINE_WITH_NESTED_VALUE], False),
+                            ([GNU_LINE_WITH_WEIGHT], True)]:
+        expected = parse(lines, weighted)
+        actual = parse(lines, weighted, compact=True)
+        assert isinstance(actual, CompactNode)
+        assert expected == actual
+        assert expected == actual.to_dict()
+
+
+def test_iter_records_intern_keys():
+    first, second = iter_records(NESTED_INPUT[:2], intern_keys=True)
+    assert first[0][1] is second[0][1]
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright 2016 Eddie Antonio Santos <easantos@ualberta.ca>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A compact node type for large nested results.
+"""
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
+
+__all__ = ['CompactNode']
+
+# Nodes with more children than this store them in a dict instead.
+MAX_TUPLE_CHILDREN = 16
+
+
+class CompactNode(Mapping):
+    """
+    A mapping used as an (inner) node of the nested results. Children can
+    be added or replaced by assigning to them (as the parser does), but not
+    removed.
+
+    Most nodes in Boa output have only a few children, so until a node has
+    more than ``MAX_TUPLE_CHILDREN`` children, they are stored in one flat
+    tuple of alternating keys and values, which is much smaller than a
+    dictionary. Beyond that, the children are moved into a dictionary.
+
+    >>> node = CompactNode()
+    >>> node['foo'] = CompactNode()
+    >>> node['foo']['bar'] = 'baz'
+    >>> node == {'foo': {'bar': 'baz'}}
+    True
+    >>> node.to_dict()
+    {'foo': {'bar': 'baz'}}
+
+    Since nodes are not dictionaries, :func:`json.dumps` cannot serialize
+    them; convert them with :meth:`to_dict` first.
+    """
+    __slots__ = ('_items',)
+
+    def __init__(self):
+        self._items = ()
+
+    def __getitem__(self, key):
+        items = self._items
+        if type(items) is dict:
+            return items[key]
+        # Output is grouped by key, so the last child is the most likely hit.
+        for i in range(len(items) - 2, -1, -2):
+            if items[i] == key:
+                return items[i + 1]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        items = self._items
+        if type(items) is dict:
+            items[key] = value
+            return
+        for i in range(len(items) - 2, -1, -2):
+            if items[i] == key:
+                self._items = items[:i + 1] + (value,) + items[i + 2:]
+                return
+        if len(items) < 2 * MAX_TUPLE_CHILDREN:
+            self._items = items + (key, value)
+        else:
+            self._items = dict(zip(items[::2], items[1::2]))
+            self._items[key] = value
+
+    def __iter__(self):
+        items = self._items
+        if type(items) is dict:
+            return iter(items)
+        return iter(items[::2])
+
+    def __len__(self):
+        items = self._items
+        if type(items) is dict:
+            return len(items)
+        return len(items) // 2
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, dict(self.items()))
+
+    def to_dict(self):
+        """
+        Converts this node and all of its descendants to plain dictionaries.
+        """
+        result = {}
+        stack = [(self, result)]
+        while stack:
+            node, converted = stack.pop()
+            for key, value in node.items():
+                if isinstance(value, CompactNode):
+                    child = converted[key] = {}
+                    stack.append((value, child))
+                else:
+                    converted[key] = value
+        return result
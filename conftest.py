@@ -0,0 +1,6 @@
+import sys
+
+# The asyncio API uses syntax that older Pythons cannot even compile.
+collect_ignore = []
+if sys.version_info < (3, 6):
+    collect_ignore += ['bop/aio.py', 'bop/test/aio_test.py']